@@ -0,0 +1,85 @@
+"""
+Time taken to calculate Carkeet coefficients and confidence intervals, and the accuracy of faster methods against the reference implementations.
+"""
+import numpy
+
+from pyCompare._carkeetCIest import carkeetCIest
+from pyCompare._carkeetCache import clearCarkeetCache, cachedCarkeetCIest
+from pyCompare._calculateConfidenceIntervals import calculateConfidenceIntervals, setBootstrapOptions
+
+
+class CarkeetCIest:
+	"""
+	Solve for a single coefficient with each integration method, 'Simpson' is the reference implementation.
+	"""
+	params = [[10, 100, 1000, 10000], ['Simpson', 'Gauss']]
+	param_names = ['n', 'integrationMethod']
+
+	def time_carkeetCIest(self, n, integrationMethod):
+		carkeetCIest(n, 0.025, 1.96, integrationMethod=integrationMethod)
+
+	def track_relativeError(self, n, integrationMethod):
+		reference = carkeetCIest(n, 0.025, 1.96, integrationMethod='Simpson')
+
+		return abs(carkeetCIest(n, 0.025, 1.96, integrationMethod=integrationMethod) / reference - 1)
+
+	track_relativeError.unit = 'relative error'
+
+
+class CarkeetCache:
+	"""
+	Look up coefficients from the precalculated table, interpolating between tabled n.
+	"""
+	params = [10, 333, 1100, 9000]
+	param_names = ['n']
+
+	def setup(self, n):
+		clearCarkeetCache()
+
+	def time_cachedCarkeetCIest(self, n):
+		cachedCarkeetCIest(n, 0.025, 1.96)
+
+	def track_relativeError(self, n):
+		reference = carkeetCIest(n, 0.025, 1.96, integrationMethod='Simpson')
+
+		return abs(cachedCarkeetCIest(n, 0.025, 1.96) / reference - 1)
+
+	track_relativeError.unit = 'relative error'
+
+
+class ConfidenceIntervals:
+	"""
+	Calculate confidence intervals by each method, from warm caches, 'bootstrap' is skipped above 10^5 pairs, where it takes many seconds.
+	"""
+	params = [['approximate', 'exact paired', 'bootstrap'], [100, 10000, 100000, 1000000]]
+	param_names = ['confidenceIntervalMethod', 'n']
+	timeout = 300
+
+	def setup(self, confidenceIntervalMethod, n):
+		if (confidenceIntervalMethod == 'bootstrap') and (n > 100000):
+			raise NotImplementedError
+
+		setBootstrapOptions(seed=0)
+
+		self.diff = numpy.random.default_rng(0).normal(0, 1, n)
+		self.md = numpy.mean(self.diff)
+		self.sd = numpy.std(self.diff)
+
+		calculateConfidenceIntervals(self.md, self.sd, n, 1.96, 95, confidenceIntervalMethod, diff=self.diff)
+
+	def teardown(self, confidenceIntervalMethod, n):
+		setBootstrapOptions()
+
+	def time_calculateConfidenceIntervals(self, confidenceIntervalMethod, n):
+		calculateConfidenceIntervals(self.md, self.sd, n, 1.96, 95, confidenceIntervalMethod, diff=self.diff)
+
+	def track_upperLoAWidth(self, confidenceIntervalMethod, n):
+		"""
+		Width of the interval on the upper limit of agreement relative to the approximate method, which it should approach as n increases.
+		"""
+		obtained = calculateConfidenceIntervals(self.md, self.sd, n, 1.96, 95, confidenceIntervalMethod, diff=self.diff)
+		reference = calculateConfidenceIntervals(self.md, self.sd, n, 1.96, 95, 'approximate')
+
+		return abs(numpy.diff(obtained['upperLoA'])[0] / numpy.diff(reference['upperLoA'])[0])
+
+	track_upperLoAWidth.unit = 'ratio'
@@ -0,0 +1,31 @@
+"""
+Time taken to import pyCompare in a fresh interpreter.
+
+Heavy dependencies (matplotlib.pyplot, scipy.stats) should only be loaded on first use, so importing pyCompare should cost little more than importing numpy.
+"""
+
+def timeraw_import_numpy():
+	return "import numpy"
+
+
+def timeraw_import_pyCompare():
+	return "import pyCompare"
+
+
+def timeraw_import_pyCompare_statistics():
+	return """
+	import numpy
+	import pyCompare
+	pyCompare.blandAltmanStatistics(numpy.arange(10.), numpy.arange(10.) ** 1.1)
+	"""
+
+
+def timeraw_import_pyCompare_plot():
+	return """
+	import os
+	import numpy
+	import matplotlib
+	matplotlib.use('Agg')
+	import pyCompare
+	pyCompare.blandAltman(numpy.arange(10.), numpy.arange(10.) ** 1.1, savePath=os.devnull)
+	"""
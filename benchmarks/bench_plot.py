@@ -0,0 +1,45 @@
+"""
+Time and peak memory taken to draw and save a Bland-Altman plot from N pairs.
+"""
+import os
+import tempfile
+
+import numpy
+import matplotlib
+matplotlib.use('Agg')
+
+import pyCompare
+
+
+class Render:
+	params = [[10, 1000, 100000, 10000000], ['scatter', 'density']]
+	param_names = ['n', 'pointRendering']
+	timeout = 300
+
+	def setup(self, n, pointRendering):
+		if (pointRendering == 'scatter') and (n > 100000):
+			raise NotImplementedError
+
+		rng = numpy.random.default_rng(0)
+
+		self.data1 = rng.uniform(10, 100, n)
+		self.data2 = self.data1 + rng.normal(0, 2, n)
+
+		self.tmpdir = tempfile.TemporaryDirectory()
+		self.savePath = os.path.join(self.tmpdir.name, 'plot.png')
+
+	def teardown(self, n, pointRendering):
+		self.tmpdir.cleanup()
+
+	def time_blandAltman(self, n, pointRendering):
+		pyCompare.blandAltman(self.data1, self.data2, pointRendering=pointRendering, savePath=self.savePath)
+
+	def peakmem_blandAltman(self, n, pointRendering):
+		pyCompare.blandAltman(self.data1, self.data2, pointRendering=pointRendering, savePath=self.savePath)
+
+	def track_fileSize(self, n, pointRendering):
+		pyCompare.blandAltman(self.data1, self.data2, pointRendering=pointRendering, savePath=self.savePath)
+
+		return os.path.getsize(self.savePath)
+
+	track_fileSize.unit = 'bytes'
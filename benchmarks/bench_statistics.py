@@ -0,0 +1,148 @@
+"""
+Time and peak memory taken to detrend data and calculate statistics, and their accuracy against reference implementations.
+"""
+import numpy
+
+import pyCompare
+from pyCompare._detrend import detrend
+
+
+def _pairs(n, dtype=numpy.float64):
+
+	rng = numpy.random.default_rng(0)
+
+	data1 = rng.uniform(10, 100, n)
+	data2 = data1 * 1.05 + rng.normal(0, 2, n)
+
+	return data1.astype(dtype), data2.astype(dtype)
+
+
+class Detrend:
+	"""
+	Detrend by each method, 'ODR' is skipped above 10^5 pairs, where it takes many seconds.
+	"""
+	params = [['Linear', 'ODR', 'Deming'], [100, 10000, 1000000]]
+	param_names = ['method', 'n']
+	timeout = 120
+
+	def setup(self, method, n):
+		if (method == 'ODR') and (n > 100000):
+			raise NotImplementedError
+
+		self.data1, self.data2 = _pairs(n)
+
+	def time_detrend(self, method, n):
+		detrend(method, self.data1, self.data2)
+
+
+class DetrendAccuracy:
+	"""
+	Difference in slope from 'ODR', which 'Deming' should match, at sizes 'ODR' can fit quickly.
+	"""
+	params = [['Linear', 'Deming'], [100, 10000]]
+	param_names = ['method', 'n']
+
+	def setup(self, method, n):
+		self.data1, self.data2 = _pairs(n)
+
+	def track_slopeDifference(self, method, n):
+		reference = detrend('ODR', self.data1, self.data2)[1]
+
+		return abs(detrend(method, self.data1, self.data2)[1] / reference - 1)
+
+	track_slopeDifference.unit = 'relative difference'
+
+
+class BatchDetrend:
+	"""
+	Detrend 1,000 pairs of methods at once.
+	"""
+	params = ['Linear', 'Deming']
+	param_names = ['method']
+
+	def setup(self, method):
+		self.data1, self.data2 = _pairs((1000, 1000))
+
+	def time_detrend(self, method):
+		detrend(method, self.data1, self.data2)
+
+
+class Statistics:
+	"""
+	Calculate statistics from N pairs.
+	"""
+	params = [[10, 1000, 100000, 10000000], ['float64', 'float32']]
+	param_names = ['n', 'dtype']
+	timeout = 120
+
+	def setup(self, n, dtype):
+		self.data1, self.data2 = _pairs(n, dtype)
+		self.out = (numpy.empty_like(self.data1), numpy.empty_like(self.data1))
+
+	def time_blandAltmanStatistics(self, n, dtype):
+		pyCompare.blandAltmanStatistics(self.data1, self.data2)
+
+	def time_blandAltmanStatistics_percentage(self, n, dtype):
+		pyCompare.blandAltmanStatistics(self.data1, self.data2, percentage=True)
+
+	def peakmem_blandAltmanStatistics(self, n, dtype):
+		pyCompare.blandAltmanStatistics(self.data1, self.data2)
+
+	def peakmem_blandAltmanStatistics_out(self, n, dtype):
+		pyCompare.blandAltmanStatistics(self.data1, self.data2, out=self.out)
+
+	def track_relativeError(self, n, dtype):
+		"""
+		Largest relative error of the mean difference and limits of agreement, against the original float64 implementation.
+		"""
+		data1 = self.data1.astype(numpy.float64)
+		data2 = self.data2.astype(numpy.float64)
+
+		diff = data1 - data2
+		md = numpy.mean(diff)
+		sd = numpy.std(diff)
+
+		reference = numpy.array([md, md + 1.96 * sd, md - 1.96 * sd])
+
+		result = pyCompare.blandAltmanStatistics(self.data1, self.data2, confidenceInterval=None)
+		obtained = numpy.array([result.md, result.upperLoA, result.lowerLoA])
+
+		return numpy.max(numpy.abs(obtained / reference - 1))
+
+	track_relativeError.unit = 'relative error'
+
+
+class NonParametricLimits:
+	"""
+	Percentile limits of agreement, calculated exactly and from a quantile sketch.
+	"""
+	params = [1000, 100000, 10000000]
+	param_names = ['n']
+	timeout = 120
+
+	def setup(self, n):
+		self.data1, self.data2 = _pairs(n)
+
+	def time_percentileLimits(self, n):
+		pyCompare.blandAltmanStatistics(self.data1, self.data2, limitOfAgreementMethod='nonparametric')
+
+	def time_sketchLimits(self, n):
+		accumulator = pyCompare.BlandAltmanAccumulator(quantileAccuracy=0.001)
+		accumulator.update(self.data1, self.data2)
+		accumulator.statistics(limitOfAgreementMethod='nonparametric')
+
+	def track_sketchRelativeError(self, n):
+		"""
+		Largest relative error of the sketched limits, against the order statistics they estimate.
+		"""
+		from pyCompare._nonParametricLimits import nonParametricQuantiles
+
+		accumulator = pyCompare.BlandAltmanAccumulator(quantileAccuracy=0.001)
+		result = accumulator.update(self.data1, self.data2).statistics(limitOfAgreementMethod='nonparametric')
+
+		ranks = numpy.floor(numpy.array(nonParametricQuantiles(1.96)) * (n - 1)).astype(int)
+		reference = numpy.sort(self.data1 - self.data2)[ranks]
+
+		return numpy.max(numpy.abs(numpy.array([result.lowerLoA, result.upperLoA]) / reference - 1))
+
+	track_sketchRelativeError.unit = 'relative error'
@@ -4,6 +4,15 @@
 import os
 
 from ._plotBlandAltman import blandAltman
+from ._blandAltmanStatistics import blandAltmanStatistics, BlandAltmanResult
+from ._blandAltmanAccumulator import BlandAltmanAccumulator
+from ._quantileSketch import QuantileSketch
+from ._blandAltmanFile import blandAltmanFile, accumulateFile
+from ._blandAltmanBatch import blandAltmanBatch
+from ._blandAltmanReport import blandAltmanReport
+from ._blandAltmanGrid import blandAltmanGrid
+from ._calculateConfidenceIntervals import setCarkeetExecutor, shutdownCarkeetExecutor, setBootstrapOptions
+from ._profiling import Profiler
 
 path = os.path.realpath(__file__)
 path = os.path.dirname(path)
@@ -12,4 +21,4 @@ path = os.path.join(path, 'VERSION')
 with open(path, 'r') as file:
 	__version__ = file.readline().strip()
 
-__all__ = ['blandAltman']
+__all__ = ['blandAltman', 'blandAltmanStatistics', 'BlandAltmanResult', 'BlandAltmanAccumulator', 'QuantileSketch', 'blandAltmanFile', 'accumulateFile', 'blandAltmanBatch', 'blandAltmanReport', 'blandAltmanGrid', 'setCarkeetExecutor', 'shutdownCarkeetExecutor', 'setBootstrapOptions', 'Profiler']
@@ -0,0 +1,220 @@
+import numpy
+
+from ._blandAltmanStatistics import BlandAltmanResult, _completePairs
+from ._calculateConfidenceIntervals import calculateConfidenceIntervals
+from ._quantileSketch import QuantileSketch
+from ._nonParametricLimits import sketchLimits
+
+class BlandAltmanAccumulator:
+	"""
+	Accumulate the statistics of a Bland-Altman comparison from paired measurements received in chunks, without holding them in memory.
+
+	Running moments of the differences and means of each pair are kept by Welford's method, so accumulators built from separate shards of the data may be combined with :py:meth:`merge`.
+
+	Detrending is not supported, as the slope must be known before differences are accumulated.
+
+	If *quantileAccuracy* is not ``None``, the differences are also summarised by a :py:class:`~pyCompare.QuantileSketch` of that relative accuracy, so that nonparametric limits of agreement may be estimated.
+
+	:param bool percentage: If ``True``, accumulate differences as percentages (instead of in the units the data sources are in)
+	:param quantileAccuracy: If not ``None``, keep a sketch of the differences with this relative accuracy
+	:type quantileAccuracy: None or float
+	:ivar int n: Number of paired observations accumulated
+	:ivar int nDropped: Number of incomplete pairs dropped
+	:ivar float meanDiff: Mean of the differences
+	:ivar float meanMean: Mean of the means of each pair
+	:ivar float minDiff: Smallest difference
+	:ivar float maxDiff: Largest difference
+	:ivar float minMean: Smallest mean
+	:ivar float maxMean: Largest mean
+	:ivar sketch: Sketch of the differences, if kept
+	:vartype sketch: None or QuantileSketch
+	"""
+	__slots__ = ('percentage', 'n', 'nDropped', 'meanDiff', 'm2Diff', 'meanMean', 'm2Mean', 'minDiff', 'maxDiff', 'minMean', 'maxMean', 'sketch')
+
+	def __init__(self, percentage=False, quantileAccuracy=None):
+
+		self.percentage = percentage
+		self.sketch = None if quantileAccuracy is None else QuantileSketch(quantileAccuracy)
+		self.n = 0
+		self.nDropped = 0
+		self.meanDiff = 0.
+		self.m2Diff = 0.
+		self.meanMean = 0.
+		self.m2Mean = 0.
+		self.minDiff = numpy.inf
+		self.maxDiff = -numpy.inf
+		self.minMean = numpy.inf
+		self.maxMean = -numpy.inf
+
+	def __repr__(self):
+
+		return f'BlandAltmanAccumulator(n={self.n}, percentage={self.percentage})'
+
+	@property
+	def sdDiff(self):
+		"""
+		Standard deviation of the differences.
+		"""
+		return numpy.sqrt(self.m2Diff / self.n)
+
+	@property
+	def sdMean(self):
+		"""
+		Standard deviation of the means of each pair.
+		"""
+		return numpy.sqrt(self.m2Mean / self.n)
+
+	def update(self, data1, data2, missingData='propagate'):
+		"""
+		Add a chunk of paired measurements.
+
+		:param data1: Values from the first method
+		:type data1: list like
+		:param data2: Paired values from the second method
+		:type data2: list like
+		:param str missingData: How to handle pairs where either value is NaN or masked, as for :py:func:`~pyCompare.blandAltmanStatistics`
+		:return: This accumulator
+		:rtype: BlandAltmanAccumulator
+		"""
+		data1, data2, valid = _completePairs(data1, data2, missingData)
+
+		if data1.shape != data2.shape:
+			raise ValueError(f'"data1" and "data2" must be the same shape, {data1.shape} and {data2.shape} provided.')
+
+		if valid is not None:
+			self.nDropped += data1.size - numpy.count_nonzero(valid)
+
+			data1 = data1[valid]
+			data2 = data2[valid]
+
+		if data1.size == 0:
+			return self
+
+		mean = (data1 + data2) / 2
+
+		if self.percentage:
+			diff = ((data1 - data2) / mean) * 100
+		else:
+			diff = data1 - data2
+
+		return self._accumulate(mean, diff)
+
+	def _accumulate(self, mean, diff):
+		"""
+		Add a chunk of pre-calculated means and differences.
+		"""
+		chunk = BlandAltmanAccumulator(percentage=self.percentage)
+
+		if self.sketch is not None:
+			chunk.sketch = QuantileSketch(self.sketch.relativeAccuracy).update(diff)
+
+		chunk.n = diff.size
+		chunk.meanDiff = numpy.mean(diff)
+		chunk.m2Diff = numpy.sum((diff - chunk.meanDiff)**2)
+		chunk.meanMean = numpy.mean(mean)
+		chunk.m2Mean = numpy.sum((mean - chunk.meanMean)**2)
+		chunk.minDiff = numpy.min(diff)
+		chunk.maxDiff = numpy.max(diff)
+		chunk.minMean = numpy.min(mean)
+		chunk.maxMean = numpy.max(mean)
+
+		return self.merge(chunk)
+
+	def merge(self, other):
+		"""
+		Combine the state of *other*, accumulated from a different set of measurements, into this accumulator.
+
+		:param BlandAltmanAccumulator other: Accumulator to merge
+		:return: This accumulator
+		:rtype: BlandAltmanAccumulator
+		"""
+		if other.percentage != self.percentage:
+			raise ValueError('Can not merge accumulators of percentage and absolute differences.')
+
+		if (other.sketch is None) != (self.sketch is None):
+			raise ValueError('Can not merge accumulators with and without sketches of the differences.')
+
+		self.nDropped += other.nDropped
+
+		if other.n == 0:
+			return self
+
+		n = self.n + other.n
+
+		self.meanDiff, self.m2Diff = _combineMoments(self.n, self.meanDiff, self.m2Diff, other.n, other.meanDiff, other.m2Diff)
+		self.meanMean, self.m2Mean = _combineMoments(self.n, self.meanMean, self.m2Mean, other.n, other.meanMean, other.m2Mean)
+
+		self.minDiff = min(self.minDiff, other.minDiff)
+		self.maxDiff = max(self.maxDiff, other.maxDiff)
+		self.minMean = min(self.minMean, other.minMean)
+		self.maxMean = max(self.maxMean, other.maxMean)
+
+		if self.sketch is not None:
+			self.sketch.merge(other.sketch)
+
+		self.n = n
+
+		return self
+
+	def statistics(self, limitOfAgreement=1.96, confidenceInterval=95, confidenceIntervalMethod='approximate', limitOfAgreementMethod='parametric'):
+		"""
+		Calculate the statistics of agreement from the measurements accumulated so far.
+
+		Nonparametric limits of agreement, and their confidence intervals, are estimated from the sketch of the differences, and so are within its relative accuracy of those calculated from the full data.
+
+		:param float limitOfAgreement: Multiples of the standard deviation to calculate limit of agreement bounds at (defaults to 1.96)
+		:param confidenceInterval: If not ``None``, calculate the specified percentage confidence interval on the mean and limits of agreement
+		:type confidenceInterval: None or float
+		:param str confidenceIntervalMethod: Method used to calculated confidence interval on the limits of agreement
+		:param str limitOfAgreementMethod: Method used to place the limits of agreement, 'parametric' or 'nonparametric'
+		:return: Statistics of agreement between the two methods
+		:rtype: BlandAltmanResult
+		"""
+		if not limitOfAgreement > 0:
+			raise ValueError('"limitOfAgreement" must be a number greater than zero.')
+
+		if limitOfAgreementMethod.lower() not in ('parametric', 'nonparametric'):
+			raise NotImplementedError(f"'{limitOfAgreementMethod}' is not a valid method of placing limits of agreement.")
+
+		nonParametric = limitOfAgreementMethod.lower() == 'nonparametric'
+
+		if nonParametric and (self.sketch is None):
+			raise ValueError('Nonparametric limits of agreement require an accumulator created with a "quantileAccuracy".')
+
+		if self.n < 2:
+			raise ValueError(f'At least two paired measurements are required, {self.n} accumulated.')
+
+		md = self.meanDiff
+		sd = self.sdDiff
+
+		if nonParametric and (confidenceIntervalMethod.lower() == 'exact paired'):
+			# Only the interval on the mean is kept, which does not depend on the Carkeet coefficients
+			confidenceIntervalMethod = 'approximate'
+
+		if confidenceInterval:
+			confidenceIntervals = calculateConfidenceIntervals(md, sd, self.n, limitOfAgreement, confidenceInterval, confidenceIntervalMethod)
+
+		else:
+			confidenceIntervals = dict()
+
+		if nonParametric:
+			lowerLoA, upperLoA, limitIntervals = sketchLimits(self.sketch, limitOfAgreement, confidenceInterval)
+			confidenceIntervals.update(limitIntervals)
+
+		else:
+			lowerLoA, upperLoA = None, None
+
+		return BlandAltmanResult(self.n, md, sd, limitOfAgreement, confidenceIntervals, percentage=self.percentage, limitOfAgreementMethod=limitOfAgreementMethod, upperLoA=upperLoA, lowerLoA=lowerLoA, nDropped=self.nDropped)
+
+
+def _combineMoments(nA, meanA, m2A, nB, meanB, m2B):
+	"""
+	Combine the mean and sum of squared deviations of two sets, by the parallel form of Welford's method (Chan et al.).
+	"""
+	n = nA + nB
+	delta = meanB - meanA
+
+	mean = meanA + delta * (nB / n)
+	m2 = m2A + m2B + delta**2 * (nA * nB / n)
+
+	return mean, m2
@@ -0,0 +1,134 @@
+import time
+import threading
+
+from ._blandAltmanStatistics import _blandAltmanStatistics
+
+# Figures reused between jobs, keyed by size and resolution, kept per thread as figures are not thread safe
+_templates = threading.local()
+
+def blandAltmanBatch(jobs, executor='process', maxWorkers=None, chunkSize=1):
+	"""
+	Render a Bland-Altman plot to disk for each of *jobs*.
+
+	Each job is a dict of keyword arguments as for :py:func:`~pyCompare.blandAltman`, and must include *data1*, *data2*, and *savePath*; *ax* is not supported. Plots are drawn with the Agg backend, and each worker reuses one figure for all jobs of the same *figureSize* and *dpi*, rather than creating and closing a figure per plot.
+
+	*executor* may be:
+	- 'process' render in a pool of *maxWorkers* worker processes, created for this call
+	- ``None`` render serially in the calling process
+	- An instance of :py:class:`concurrent.futures.Executor`, which remains the responsibility of the caller to shut down
+
+	A job that fails does not stop the batch, instead its error is reported in the results.
+
+	:param jobs: Plots to render
+	:type jobs: list of dict
+	:param executor: Executor to render with
+	:type executor: None, str, or concurrent.futures.Executor
+	:param maxWorkers: Number of processes in the pool, defaults to the number of processors
+	:type maxWorkers: None or int
+	:param int chunkSize: Number of jobs sent to a worker process at a time
+	:return: For each job in order, a dict of the 'savePath' written, the 'time' taken in seconds, and the 'error' raised (``None`` if successful)
+	:rtype: list of dict
+	"""
+	from concurrent.futures import Executor, ProcessPoolExecutor
+
+	jobs = list(jobs)
+
+	if executor is None:
+		return [_renderJob(job) for job in jobs]
+
+	elif isinstance(executor, Executor):
+		return list(executor.map(_renderJob, jobs, chunksize=chunkSize))
+
+	elif isinstance(executor, str) and (executor.lower() == 'process'):
+		with ProcessPoolExecutor(max_workers=maxWorkers) as pool:
+			return list(pool.map(_renderJob, jobs, chunksize=chunkSize))
+
+	else:
+		raise NotImplementedError(f"'{executor}' is not a valid executor.")
+
+
+def _renderJob(job):
+	"""
+	Render a single job, returning its timing and any error raised as a string, so results can always be returned from a worker process.
+	"""
+	start = time.perf_counter()
+
+	try:
+		_renderToFile(**job)
+		error = None
+
+	except Exception as e:
+		error = f'{type(e).__name__}: {e}'
+
+	return {'savePath': job.get('savePath'), 'time': time.perf_counter() - start, 'error': error}
+
+
+def _renderToFile(data1, data2, savePath, figureSize=(10,7), dpi=72, figureFormat='png', **kwargs):
+	"""
+	Draw a plot into the template axes for *figureSize* and *dpi* and save it, returning the statistics drawn.
+	"""
+	ax = _templateAxes(figureSize, dpi)
+
+	result = _drawJob(ax, data1, data2, **kwargs)
+
+	ax.figure.savefig(savePath, format=figureFormat, dpi=dpi)
+
+	return result
+
+
+def _drawJob(ax, data1, data2, limitOfAgreement=1.96, confidenceInterval=95, confidenceIntervalMethod='approximate', percentage=False, detrend=None, title=None, meanColour='#6495ED', loaColour='coral', pointColour='#6495ED', pointRendering='auto', subjects=None, limitOfAgreementMethod='parametric', missingData='propagate'):
+	"""
+	Calculate statistics and draw a plot into *ax*, with arguments as for :py:func:`~pyCompare.blandAltman`, returning the statistics.
+	"""
+	from ._plotBlandAltman import _drawBlandAltman, _limitLines
+
+	mean, diff, result = _blandAltmanStatistics(data1, data2, limitOfAgreement, confidenceInterval, confidenceIntervalMethod, percentage, detrend, subjects, limitOfAgreementMethod, missingData)
+
+	_drawBlandAltman(mean, diff, result.md, result.sd, percentage,
+					 limitOfAgreement,
+					 result.confidenceIntervals,
+					 (detrend, result.slope, result.slopeErr),
+					 title,
+					 ax,
+					 None,
+					 None,
+					 None,
+					 None,
+					 meanColour,
+					 loaColour,
+					 pointColour,
+					 pointRendering,
+					 _limitLines(result),
+					 result.regression)
+
+	return result
+
+
+def _templateAxes(figureSize, dpi):
+	"""
+	Return cleared axes on an Agg figure of *figureSize* and *dpi*, creating the figure on first use in this thread.
+	"""
+	templates = getattr(_templates, 'axes', None)
+
+	if templates is None:
+		templates = _templates.axes = dict()
+
+	key = (tuple(figureSize), dpi)
+
+	if key in templates:
+		ax = templates[key]
+		ax.clear()
+		# Clearing leaves the data limits of the last plot, which the first y-only update would otherwise extend
+		ax.relim()
+
+	else:
+		from matplotlib.figure import Figure
+		from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+		fig = Figure(figsize=figureSize, dpi=dpi)
+		FigureCanvasAgg(fig)
+
+		ax = fig.add_subplot(111)
+		templates[key] = ax
+
+	return ax
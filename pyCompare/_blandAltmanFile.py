@@ -0,0 +1,218 @@
+import os
+import numpy
+
+from ._blandAltmanAccumulator import BlandAltmanAccumulator
+from ._blandAltmanStatistics import _completePairs
+
+# Relative accuracy of the sketch kept for nonparametric limits of agreement
+QUANTILE_ACCURACY = 0.001
+
+def blandAltmanFile(source, columns=None, limitOfAgreement=1.96, confidenceInterval=95, confidenceIntervalMethod='approximate', percentage=False, chunkSize=1000000, plotPoints=10000, seed=None, title=None, ax=None, figureSize=(10,7), dpi=72, savePath=None, figureFormat='png', meanColour='#6495ED', loaColour='coral', pointColour='#6495ED', limitOfAgreementMethod='parametric', missingData='propagate'):
+	"""
+	blandAltmanFile(source, columns=None, limitOfAgreement=1.96, confidenceInterval=95, **kwargs)
+
+	Generate a Bland-Altman plot from measurements stored on disk, reading them in chunks so that memory use is bounded by *chunkSize* and *plotPoints* rather than the size of the file.
+
+	Statistics are calculated from every pair in the file, while only a uniform random sample of *plotPoints* pairs (plus the pairs at the extremes of each axis, so the range frame spans all the data) is drawn.
+
+	*source* may be:
+	- A .npy file holding an array of shape (n, 2), or a tuple of two .npy files each holding n values, which are memory-mapped
+	- A .csv file, read with :py:func:`pandas.read_csv`, with the two methods in the columns named by *columns*
+	- A .parquet file, read with `pyarrow <https://arrow.apache.org/docs/python/>`_, with the two methods in the columns named by *columns*
+
+	Nonparametric limits of agreement are estimated from a sketch of the differences, to within 0.1 % of those calculated from the full data.
+
+	Missing values, such as empty .csv fields and .parquet nulls, are read as NaN and handled as set by *missingData*, chunk by chunk. Detrending is not supported, other arguments are as for :py:func:`~pyCompare.blandAltman`.
+
+	:param source: Path (or pair of paths) to read measurements from
+	:type source: str or (str, str)
+	:param columns: Names of the columns holding the first and second methods, for .csv and .parquet files
+	:type columns: None or (str, str)
+	:param int chunkSize: Number of pairs to read at a time
+	:param int plotPoints: Maximum number of pairs to sample for plotting
+	:param seed: Seed for sampling the pairs plotted
+	:type seed: None or int
+	"""
+	from ._plotBlandAltman import _drawBlandAltman, _limitLines
+
+	quantileAccuracy = QUANTILE_ACCURACY if limitOfAgreementMethod.lower() == 'nonparametric' else None
+
+	accumulator, mean, diff = _scanFile(source, columns, percentage, chunkSize, plotPoints, seed, quantileAccuracy, missingData)
+
+	result = accumulator.statistics(limitOfAgreement=limitOfAgreement, confidenceInterval=confidenceInterval, confidenceIntervalMethod=confidenceIntervalMethod, limitOfAgreementMethod=limitOfAgreementMethod)
+
+	ax = _drawBlandAltman(mean, diff, result.md, result.sd, percentage,
+						  limitOfAgreement,
+						  result.confidenceIntervals,
+						  (None, None, None),
+						  title,
+						  ax,
+						  figureSize,
+						  dpi,
+						  savePath,
+						  figureFormat,
+						  meanColour,
+						  loaColour,
+						  pointColour,
+						  'auto',
+						  _limitLines(result))
+
+	if ax is not None:
+		return ax
+
+
+def accumulateFile(source, columns=None, percentage=False, chunkSize=1000000, quantileAccuracy=None, missingData='propagate'):
+	"""
+	Accumulate the statistics of measurements stored on disk, reading them in chunks.
+
+	Arguments are as for :py:func:`blandAltmanFile`, call :py:meth:`~pyCompare.BlandAltmanAccumulator.statistics` on the result to obtain limits of agreement and confidence intervals.
+
+	:param quantileAccuracy: If not ``None``, keep a sketch of the differences with this relative accuracy, to estimate nonparametric limits of agreement
+	:type quantileAccuracy: None or float
+	:param str missingData: How to handle pairs where either value is missing, as for :py:func:`~pyCompare.blandAltmanStatistics`
+	:return: Accumulator holding every pair in *source*
+	:rtype: BlandAltmanAccumulator
+	"""
+	accumulator = BlandAltmanAccumulator(percentage=percentage, quantileAccuracy=quantileAccuracy)
+
+	for data1, data2 in _readChunks(source, columns, chunkSize):
+		accumulator.update(data1, data2, missingData)
+
+	return accumulator
+
+
+def _scanFile(source, columns, percentage, chunkSize, plotPoints, seed, quantileAccuracy=None, missingData='propagate'):
+	"""
+	Accumulate every pair in *source*, while keeping a uniform sample of at most *plotPoints* means and differences, and the pairs at the extremes of each, ignoring any that are NaN.
+	"""
+	rng = numpy.random.default_rng(seed)
+
+	accumulator = BlandAltmanAccumulator(percentage=percentage, quantileAccuracy=quantileAccuracy)
+
+	# Reservoir of sampled points, each kept with a random key, the plotPoints smallest keys form a uniform sample
+	sampleKeys = numpy.empty(0)
+	sampleMean = numpy.empty(0)
+	sampleDiff = numpy.empty(0)
+
+	extremeMean = numpy.empty(0)
+	extremeDiff = numpy.empty(0)
+
+	for data1, data2 in _readChunks(source, columns, chunkSize):
+		data1, data2, valid = _completePairs(numpy.asarray(data1, dtype=float), numpy.asarray(data2, dtype=float), missingData)
+
+		if valid is not None:
+			accumulator.nDropped += data1.size - numpy.count_nonzero(valid)
+
+			data1 = data1[valid]
+			data2 = data2[valid]
+
+		if data1.size == 0:
+			continue
+
+		mean = (data1 + data2) / 2
+
+		if percentage:
+			diff = ((data1 - data2) / mean) * 100
+		else:
+			diff = data1 - data2
+
+		accumulator._accumulate(mean, diff)
+
+		keys = rng.random(mean.size)
+
+		sampleKeys = numpy.concatenate((sampleKeys, keys))
+		sampleMean = numpy.concatenate((sampleMean, mean))
+		sampleDiff = numpy.concatenate((sampleDiff, diff))
+
+		if sampleKeys.size > plotPoints:
+			keep = numpy.argpartition(sampleKeys, plotPoints)[:plotPoints]
+
+			sampleKeys = sampleKeys[keep]
+			sampleMean = sampleMean[keep]
+			sampleDiff = sampleDiff[keep]
+
+		# Pairs propagating a missing value are not extremes
+		finite = numpy.isfinite(mean) & numpy.isfinite(diff)
+
+		if not finite.any():
+			continue
+
+		if not finite.all():
+			mean = mean[finite]
+			diff = diff[finite]
+
+		extremes = [numpy.argmin(mean), numpy.argmax(mean), numpy.argmin(diff), numpy.argmax(diff)]
+
+		extremeMean = numpy.concatenate((extremeMean, mean[extremes]))
+		extremeDiff = numpy.concatenate((extremeDiff, diff[extremes]))
+
+		extremes = numpy.unique([numpy.argmin(extremeMean), numpy.argmax(extremeMean), numpy.argmin(extremeDiff), numpy.argmax(extremeDiff)])
+
+		extremeMean = extremeMean[extremes]
+		extremeDiff = extremeDiff[extremes]
+
+	mean = numpy.concatenate((sampleMean, extremeMean))
+	diff = numpy.concatenate((sampleDiff, extremeDiff))
+
+	return accumulator, mean, diff
+
+
+def _readChunks(source, columns, chunkSize):
+	"""
+	Yield (data1, data2) arrays of at most *chunkSize* pairs from *source*.
+	"""
+	if isinstance(source, (tuple, list)):
+		data1 = numpy.load(source[0], mmap_mode='r')
+		data2 = numpy.load(source[1], mmap_mode='r')
+
+		if data1.shape != data2.shape:
+			raise ValueError(f'"{source[0]}" and "{source[1]}" must hold arrays of the same shape, {data1.shape} and {data2.shape} found.')
+
+		for start in range(0, len(data1), chunkSize):
+			yield data1[start:start + chunkSize], data2[start:start + chunkSize]
+
+		return
+
+	extension = os.path.splitext(source)[1].lower()
+
+	if extension == '.npy':
+		data = numpy.load(source, mmap_mode='r')
+
+		if (data.ndim != 2) or (data.shape[1] != 2):
+			raise ValueError(f'"{source}" must hold an array of shape (n, 2), {data.shape} found.')
+
+		for start in range(0, len(data), chunkSize):
+			yield data[start:start + chunkSize, 0], data[start:start + chunkSize, 1]
+
+	elif extension == '.csv':
+		import pandas
+
+		_checkColumns(columns)
+
+		# Closed even if reading stops early, as when a missing value raises
+		with pandas.read_csv(source, usecols=list(columns), chunksize=chunkSize) as reader:
+			for chunk in reader:
+				yield chunk[columns[0]].to_numpy(), chunk[columns[1]].to_numpy()
+
+	elif extension in ('.parquet', '.pq'):
+		try:
+			import pyarrow.parquet
+		except ImportError as e: # pragma: no cover
+			raise ImportError('Reading .parquet files requires pyarrow to be installed.') from e
+
+		_checkColumns(columns)
+
+		parquetFile = pyarrow.parquet.ParquetFile(source)
+
+		# Nulls are read as NaN, as from .csv files
+		for batch in parquetFile.iter_batches(batch_size=chunkSize, columns=list(columns)):
+			yield batch.column(columns[0]).to_numpy(zero_copy_only=False), batch.column(columns[1]).to_numpy(zero_copy_only=False)
+
+	else:
+		raise NotImplementedError(f"'{extension}' is not a supported file type.")
+
+
+def _checkColumns(columns):
+
+	if (columns is None) or (len(columns) != 2):
+		raise ValueError(f'"columns" must name the two columns to compare, "{columns}" provided.')
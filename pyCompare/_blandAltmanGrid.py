@@ -0,0 +1,144 @@
+import numpy
+
+from ._detrend import detrend as detrendFun
+from ._blandAltmanStatistics import BlandAltmanResult, meanDifference
+from ._calculateConfidenceIntervals import calculateConfidenceIntervals
+
+def blandAltmanGrid(data1, data2, groups, limitOfAgreement=1.96, confidenceInterval=95, confidenceIntervalMethod='approximate', percentage=False, detrend=None, columns=3, sharex=False, sharey=False, title=None, panelSize=(5,3.5), dpi=72, savePath=None, figureFormat='png', meanColour='#6495ED', loaColour='coral', pointColour='#6495ED', pointRendering='auto'):
+	"""
+	blandAltmanGrid(data1, data2, groups, limitOfAgreement=1.96, confidenceInterval=95, **kwargs)
+
+	Generate a grid of Bland-Altman plots, one panel per group of measurements, such as the site, operator, or device lot each pair was measured at.
+
+	Statistics for all groups are calculated in a single pass over the data sorted by group, and each panel is titled with its group and drawn as by :py:func:`~pyCompare.blandAltman`. If *detrend* is not ``None``, each group is detrended separately.
+
+	Other arguments are as for :py:func:`~pyCompare.blandAltman`.
+
+	:param data1: List of values from the first method
+	:type data1: list like
+	:param data2: List of paired values from the second method
+	:type data2: list like
+	:param groups: Group of each pair of values
+	:type groups: list like
+	:param int columns: Number of panels in each row of the grid
+	:param bool sharex: If ``True``, use the same x-axis limits in every panel
+	:param bool sharey: If ``True``, use the same y-axis limits in every panel
+	:param str title: Title text for the figure
+	:param panelSize: Size of each panel as a tuple of (width, height) in inches
+	:type panelSize: (float, float)
+	:return: If *savePath* is ``None``, the figure drawn, otherwise ``None``
+	:rtype: None or matplotlib.figure.Figure
+	"""
+	import matplotlib.pyplot as plt
+
+	from ._plotBlandAltman import _drawBlandAltman
+
+	labels, starts, counts, mean, diff, results = _groupedStatistics(data1, data2, groups, limitOfAgreement, confidenceInterval, confidenceIntervalMethod, percentage, detrend)
+
+	rows = -(-len(labels) // columns)
+
+	fig, axes = plt.subplots(rows, columns, figsize=(panelSize[0] * columns, panelSize[1] * rows), dpi=dpi, squeeze=False, constrained_layout=True)
+	axes = axes.ravel()
+
+	for label, start, count, result, ax in zip(labels, starts, counts, results, axes):
+		group = slice(start, start + count)
+
+		_drawBlandAltman(mean[group], diff[group], result.md, result.sd, percentage,
+						 limitOfAgreement,
+						 result.confidenceIntervals,
+						 (detrend, result.slope, result.slopeErr),
+						 str(label),
+						 ax,
+						 None,
+						 None,
+						 None,
+						 None,
+						 meanColour,
+						 loaColour,
+						 pointColour,
+						 pointRendering)
+
+	# Hide the unused panels in the last row
+	for ax in axes[len(labels):]:
+		ax.set_visible(False)
+
+	axes = axes[:len(labels)]
+
+	if sharex:
+		limits = numpy.array([ax.get_xlim() for ax in axes])
+		for ax in axes:
+			ax.set_xlim(limits[:, 0].min(), limits[:, 1].max())
+
+	if sharey:
+		limits = numpy.array([ax.get_ylim() for ax in axes])
+		for ax in axes:
+			ax.set_ylim(limits[:, 0].min(), limits[:, 1].max())
+
+	if title:
+		fig.suptitle(title)
+
+	##
+	# Save or draw
+	##
+	if savePath is not None:
+		fig.savefig(savePath, format=figureFormat, dpi=dpi)
+		plt.close(fig)
+	else:
+		plt.show()
+
+		return fig
+
+
+def _groupedStatistics(data1, data2, groups, limitOfAgreement, confidenceInterval, confidenceIntervalMethod, percentage, detrend):
+	"""
+	Sort pairs by group and calculate the means, differences and statistics of every group, with the differences of each group reduced by :py:meth:`numpy.ufunc.reduceat`, and the confidence intervals of every group calculated together, except by the bootstrap method, which resamples each group separately.
+
+	:return: Tuple of the sorted unique group labels, the index at which each group starts in the sorted data, the size of each group, the sorted means and differences, and a list of the statistics of each group
+	"""
+	if not limitOfAgreement > 0:
+		raise ValueError('"limitOfAgreement" must be a number greater than zero.')
+
+	data1 = numpy.asarray(data1)
+	data2 = numpy.asarray(data2)
+	groups = numpy.asarray(groups)
+
+	if (data1.ndim != 1) or (data1.shape != data2.shape) or (data1.shape != groups.shape):
+		raise ValueError(f'"data1", "data2", and "groups" must be one dimensional and the same length, {data1.shape}, {data2.shape} and {groups.shape} provided.')
+
+	order = numpy.argsort(groups, kind='stable')
+	labels, starts, counts = numpy.unique(groups[order], return_index=True, return_counts=True)
+
+	data1 = data1[order]
+	data2 = data2[order]
+
+	slopes = [None] * len(labels)
+	slopeErrs = [None] * len(labels)
+
+	if detrend is not None:
+		data2 = data2.astype(float)
+
+		for i, (start, count) in enumerate(zip(starts, counts)):
+			group = slice(start, start + count)
+			data2[group], slopes[i], slopeErrs[i] = detrendFun(detrend, data1[group], data2[group])
+
+	mean, diff = meanDifference(data1, data2, percentage)
+
+	md = numpy.add.reduceat(diff, starts) / counts
+	sd = numpy.sqrt(numpy.add.reduceat((diff - numpy.repeat(md, counts))**2, starts) / counts)
+
+	if not confidenceInterval:
+		confidenceIntervals = [dict()] * len(labels)
+
+	elif confidenceIntervalMethod.lower() == 'bootstrap':
+		confidenceIntervals = [calculateConfidenceIntervals(md[i], sd[i], n, limitOfAgreement, confidenceInterval, confidenceIntervalMethod, diff=diff[starts[i]:starts[i] + n]) for i, n in enumerate(counts)]
+
+	else:
+		grouped = calculateConfidenceIntervals(md, sd, counts, limitOfAgreement, confidenceInterval, confidenceIntervalMethod)
+
+		confidenceIntervals = [{key: (lower[i], upper[i]) for key, (lower, upper) in grouped.items()} for i in range(len(labels))]
+
+	results = list()
+	for i, n in enumerate(counts):
+		results.append(BlandAltmanResult(n, md[i], sd[i], limitOfAgreement, confidenceIntervals[i], percentage=percentage, detrend=detrend, slope=slopes[i], slopeErr=slopeErrs[i]))
+
+	return labels, starts, counts, mean, diff, results
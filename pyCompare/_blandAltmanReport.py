@@ -0,0 +1,40 @@
+from ._blandAltmanBatch import _drawJob
+
+def blandAltmanReport(savePath, pages, figureSize=(10,7), dpi=72, metadata=None):
+	"""
+	Write a multi-page PDF report with a Bland-Altman plot on each page.
+
+	Each page is a dict of keyword arguments as for :py:func:`~pyCompare.blandAltman`, and must include *data1* and *data2*; *ax*, *savePath*, *figureSize*, *dpi* and *figureFormat* are not supported.
+
+	Pages are drawn one at a time into a single figure, which is written to the report and cleared before the next page is drawn. As *pages* may be a generator, only the data for the page being drawn need be held in memory, however many pages the report has.
+
+	:param str savePath: Save the report at this path
+	:param pages: Plots to draw, one per page
+	:type pages: iterable of dict
+	:param figureSize: Page size as a tuple of (width, height) in inches
+	:type figureSize: (float, float)
+	:param int dpi: Resolution of any rasterised elements
+	:param metadata: Document information to set in the report, as for :py:class:`matplotlib.backends.backend_pdf.PdfPages`
+	:type metadata: None or dict
+	:return: Number of pages written
+	:rtype: int
+	"""
+	from matplotlib.figure import Figure
+	from matplotlib.backends.backend_pdf import PdfPages
+
+	fig = Figure(figsize=figureSize, dpi=dpi)
+
+	pageCount = 0
+
+	with PdfPages(savePath, metadata=metadata) as pdf:
+		for page in pages:
+			ax = fig.add_subplot(111)
+
+			_drawJob(ax, **page)
+
+			pdf.savefig(fig)
+			fig.clear()
+
+			pageCount += 1
+
+	return pageCount
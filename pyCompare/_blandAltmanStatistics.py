@@ -0,0 +1,359 @@
+import numpy
+
+from ._detrend import detrend as detrendFun
+from ._calculateConfidenceIntervals import calculateConfidenceIntervals
+from ._nonParametricLimits import percentileLimits
+from ._regressionLimits import regressionLimits
+from ._profiling import timed, count
+
+# Number of values each temporary array of squared deviations is limited to
+CHUNK_SIZE = 2**20
+
+class BlandAltmanResult:
+	"""
+	Statistics describing the agreement between two methods, as returned by :py:func:`blandAltmanStatistics`.
+
+	Where statistics were calculated for a batch of method pairs, each is an array with an entry per pair.
+
+	:ivar int n: Number of paired observations, excluding any dropped as incomplete
+	:ivar int nDropped: Number of incomplete pairs dropped
+	:ivar nSubjects: Number of subjects, where repeated measurements of each subject were analysed
+	:vartype nSubjects: None or int
+	:ivar float md: Mean difference between methods
+	:ivar float sd: Standard deviation of the differences
+	:ivar float limitOfAgreement: Multiples of the standard deviation the limits of agreement are placed at, or correspond to if placed at percentiles of the differences
+	:ivar str limitOfAgreementMethod: Method used to place the limits of agreement
+	:ivar float upperLoA: Upper limit of agreement, at the mean of the means of each pair for regression-based limits
+	:ivar float lowerLoA: Lower limit of agreement, at the mean of the means of each pair for regression-based limits
+	:ivar regression: For regression-based limits, tuples of the (intercept, slope) on the means of each pair of the mean difference and limits of agreement, keyed by 'mean', 'upperLoA' and 'lowerLoA'
+	:vartype regression: None or dict
+	:ivar dict confidenceIntervals: Confidence intervals keyed by 'mean', 'upperLoA' and 'lowerLoA', empty if not calculated
+	:ivar bool percentage: ``True`` if differences are expressed as percentages
+	:ivar detrend: Detrending method applied
+	:ivar slope: Slope correction factor found by detrending
+	:ivar slopeErr: Standard error of the slope correction factor
+	"""
+	__slots__ = ('n', 'nDropped', 'nSubjects', 'md', 'sd', 'limitOfAgreement', 'limitOfAgreementMethod', 'upperLoA', 'lowerLoA', 'regression', 'confidenceIntervals', 'percentage', 'detrend', 'slope', 'slopeErr')
+
+	def __init__(self, n, md, sd, limitOfAgreement, confidenceIntervals, percentage=False, detrend=None, slope=None, slopeErr=None, nSubjects=None, limitOfAgreementMethod='parametric', upperLoA=None, lowerLoA=None, regression=None, nDropped=0):
+
+		self.n = n
+		self.nDropped = nDropped
+		self.nSubjects = nSubjects
+		self.md = md
+		self.sd = sd
+		self.limitOfAgreement = limitOfAgreement
+		self.limitOfAgreementMethod = limitOfAgreementMethod
+		self.upperLoA = md + (limitOfAgreement * sd) if upperLoA is None else upperLoA
+		self.lowerLoA = md - (limitOfAgreement * sd) if lowerLoA is None else lowerLoA
+		self.regression = regression
+		self.confidenceIntervals = confidenceIntervals
+		self.percentage = percentage
+		self.detrend = detrend
+		self.slope = slope
+		self.slopeErr = slopeErr
+
+	def __repr__(self):
+
+		if numpy.ndim(self.md):
+			return f'BlandAltmanResult(n={self.n}, pairs={len(self.md)})'
+
+		return f'BlandAltmanResult(n={self.n}, md={self.md:.4g}, sd={self.sd:.4g}, lowerLoA={self.lowerLoA:.4g}, upperLoA={self.upperLoA:.4g})'
+
+
+def blandAltmanStatistics(data1, data2, limitOfAgreement=1.96, confidenceInterval=95, confidenceIntervalMethod='approximate', percentage=False, detrend=None, subjects=None, limitOfAgreementMethod='parametric', missingData='propagate', out=None):
+	"""
+	blandAltmanStatistics(data1, data2, limitOfAgreement=1.96, confidenceInterval=95, **kwargs)
+
+	Calculate the statistics shown on a Bland-Altman plot, without drawing it.
+
+	Arguments are as for :py:func:`~pyCompare.blandAltman`.
+
+	To compare many pairs of methods with the same number of measurements at once, pass *data1* and *data2* as 2-D arrays with a row per pair. Statistics for each pair are then calculated along the rows and returned as arrays, with Carkeet coefficients for the 'exact paired' method calculated once for all pairs.
+
+	Means and differences are calculated in place, in the precision of floating point data, so float32 data is not promoted, and into the arrays in *out* if given. Statistics are accumulated in float64 in chunks of :py:data:`CHUNK_SIZE` values. Beyond the data, the means and differences, peak memory for parametric limits is then bounded by a chunk. Incomplete pairs are dropped by holding their means and differences as NaN, and excluding them from each reduction, at the cost of a boolean mask; the complete pairs are only copied out of *data1* and *data2* when detrending, and out of the differences for repeated measurements. Detrending, nonparametric and regression-based limits each need roughly one more array the size of the data.
+
+	:param data1: List of values from the first method
+	:type data1: list like or 2-D array
+	:param data2: List of paired values from the second method
+	:type data2: list like or 2-D array
+	:param float limitOfAgreement: Multiples of the standard deviation to calculate limit of agreement bounds at (defaults to 1.96)
+	:param confidenceInterval: If not ``None``, calculate the specified percentage confidence interval on the mean and limits of agreement
+	:type confidenceInterval: None or float
+	:param str confidenceIntervalMethod: Method used to calculated confidence interval on the limits of agreement
+	:param bool percentage: If ``True``, calculate differences as percentages (instead of in the units the data sources are in)
+	:param detrend: If not ``None`` attempt to detrend by the method specified
+	:type detrend: None or str
+	:param subjects: If not ``None``, the subject each pair of values was measured in, to analyse repeated measurements of each subject
+	:type subjects: None or list like
+	:param str limitOfAgreementMethod: Method used to place the limits of agreement
+	:param str missingData: How to handle pairs where either value is NaN or masked
+	:param out: If not ``None``, a tuple of floating point arrays the same shape as the data, to write the means and differences of each pair into
+	:type out: None or (numpy.array, numpy.array)
+	:return: Statistics of agreement between the two methods
+	:rtype: BlandAltmanResult
+	"""
+	mean, diff, result = _blandAltmanStatistics(data1, data2, limitOfAgreement, confidenceInterval, confidenceIntervalMethod, percentage, detrend, subjects, limitOfAgreementMethod, missingData, out)
+
+	return result
+
+
+@timed('statistics')
+def _blandAltmanStatistics(data1, data2, limitOfAgreement, confidenceInterval, confidenceIntervalMethod, percentage, detrend, subjects=None, limitOfAgreementMethod='parametric', missingData='propagate', out=None):
+	"""
+	Calculate the means and differences to be plotted, and statistics summarising them.
+	"""
+	if not limitOfAgreement > 0:
+		raise ValueError('"limitOfAgreement" must be a number greater than zero.')
+
+	if limitOfAgreementMethod.lower() not in ('parametric', 'nonparametric', 'regression'):
+		raise NotImplementedError(f"'{limitOfAgreementMethod}' is not a valid method of placing limits of agreement.")
+
+	nonParametric = limitOfAgreementMethod.lower() == 'nonparametric'
+	regressionBased = limitOfAgreementMethod.lower() == 'regression'
+
+	data1, data2, valid = _completePairs(data1, data2, missingData)
+
+	if data1.shape != data2.shape:
+		raise ValueError(f'"data1" and "data2" must be the same shape, {data1.shape} and {data2.shape} provided.')
+
+	if subjects is not None:
+		subjects = numpy.asarray(subjects)
+
+		if (data1.ndim != 1) or (subjects.shape != data1.shape):
+			raise ValueError(f'"subjects" must be one dimensional and the same length as "data1" and "data2", {subjects.shape} and {data1.shape} provided.')
+
+	nDropped = 0
+
+	if valid is not None:
+		nDropped = data1.shape[-1] - numpy.count_nonzero(valid, axis=-1)
+
+		if data1.ndim == 1:
+			nDropped = int(nDropped)
+
+			if subjects is not None:
+				subjects = subjects[valid]
+
+			if detrend is not None:
+				# Detrending fits the complete pairs themselves
+				data1 = data1[valid]
+				data2 = data2[valid]
+				valid = None
+
+		elif (detrend is not None) or nonParametric or regressionBased:
+			raise NotImplementedError('Detrending, and nonparametric or regression-based limits of agreement, are not supported for batches with missing pairs.')
+
+	data2, slope, slopeErr = detrendFun(detrend, data1, data2)
+
+	mean, diff = meanDifference(data1, data2, percentage, out)
+
+	# Reduce along the last axis so each row of 2-D inputs is treated as a pair of methods
+	if valid is None:
+		n = diff.shape[-1]
+		md = numpy.mean(diff, axis=-1, dtype=numpy.float64)
+
+	else:
+		# Missing pairs are held as NaN, rather than copying out the complete pairs, and excluded from each reduction
+		mean[~valid] = numpy.nan
+		diff[~valid] = numpy.nan
+
+		n = numpy.count_nonzero(valid, axis=-1)
+		if diff.ndim == 1:
+			n = int(n)
+
+		md = numpy.sum(diff, axis=-1, dtype=numpy.float64, where=valid) / n
+
+	if subjects is None:
+		sd = numpy.sqrt(_sumSquares(diff, md, valid) / n)
+
+		nSubjects = None
+		# Number of independent observations the confidence intervals are based on
+		nIndependent = n
+
+	else:
+		if confidenceInterval and (confidenceIntervalMethod.lower() == 'bootstrap'):
+			raise NotImplementedError('Bootstrap confidence intervals resample pairs independently, and are not supported for repeated measurements.')
+
+		if nonParametric or regressionBased:
+			raise NotImplementedError(f'{limitOfAgreementMethod} limits of agreement assume independent pairs, and are not supported for repeated measurements.')
+
+		sd, nSubjects = _repeatedMeasuresSD(diff if valid is None else diff[valid], subjects)
+		nIndependent = nSubjects
+
+	if nonParametric and (confidenceIntervalMethod.lower() == 'exact paired'):
+		# Only the interval on the mean is kept, which does not depend on the Carkeet coefficients
+		confidenceIntervalMethod = 'approximate'
+
+	if confidenceInterval and not regressionBased:
+		confidenceIntervals = calculateConfidenceIntervals(md, sd, nIndependent, limitOfAgreement, confidenceInterval, confidenceIntervalMethod, diff=diff)
+
+	else:
+		confidenceIntervals = dict()
+
+	regression = None
+
+	if nonParametric:
+		lowerLoA, upperLoA, limitIntervals = percentileLimits(diff, limitOfAgreement, confidenceInterval, n=n)
+		confidenceIntervals.update(limitIntervals)
+
+	elif regressionBased:
+		regression = regressionLimits(mean, diff, limitOfAgreement, where=valid)
+
+		centre = numpy.sum(mean, axis=-1, where=True if valid is None else valid) / n
+		lowerLoA = regression['lowerLoA'][0] + regression['lowerLoA'][1] * centre
+		upperLoA = regression['upperLoA'][0] + regression['upperLoA'][1] * centre
+
+	else:
+		lowerLoA, upperLoA = None, None
+
+	count('pairs', int(numpy.sum(n)))
+	count('pairsDropped', int(numpy.sum(nDropped)))
+
+	result = BlandAltmanResult(n, md, sd, limitOfAgreement, confidenceIntervals, percentage=percentage, detrend=detrend, slope=slope, slopeErr=slopeErr, nSubjects=nSubjects, limitOfAgreementMethod=limitOfAgreementMethod, upperLoA=upperLoA, lowerLoA=lowerLoA, regression=regression, nDropped=nDropped)
+
+	return mean, diff, result
+
+
+@timed('meanDifference')
+def meanDifference(data1, data2, percentage, out=None):
+	"""
+	Calculate the mean and difference of each pair, without stacking or promoting the data.
+
+	Both are calculated with ufuncs writing directly to their results, in the precision of *data1* and *data2* if they are floating point, and in float64 otherwise, or into the arrays in *out* if given.
+
+	:param numpy.array data1: Array of first measures
+	:param numpy.array data2: Array of second measures
+	:param bool percentage: If ``True``, express differences as a percentage of the mean
+	:param out: If not ``None``, a tuple of floating point arrays the same shape as the data, to write the means and differences into
+	:type out: None or (numpy.array, numpy.array)
+	:return: Tuple of the means and differences
+	:rtype: (numpy.array, numpy.array)
+	"""
+	if out is None:
+		dtype = numpy.result_type(data1, data2)
+
+		if not numpy.issubdtype(dtype, numpy.floating):
+			dtype = numpy.float64
+
+		mean = numpy.empty(data1.shape, dtype=dtype)
+		diff = numpy.empty(data1.shape, dtype=dtype)
+
+	else:
+		mean, diff = out
+
+		for buffer in out:
+			if (buffer.shape != data1.shape) or not numpy.issubdtype(buffer.dtype, numpy.floating):
+				raise ValueError(f'"out" must be floating point arrays the same shape as the data, {data1.shape}, arrays of {buffer.shape} and {buffer.dtype} provided.')
+
+	numpy.add(data1, data2, out=mean)
+	mean *= 0.5
+
+	numpy.subtract(data1, data2, out=diff)
+
+	if percentage:
+		diff /= mean
+		diff *= 100
+
+	return mean, diff
+
+
+def _sumSquares(diff, md, where=None):
+	"""
+	Sum of squared deviations of *diff* from *md* along the last axis, accumulated in float64 over chunks of the last axis, so that no temporary holds more than :py:data:`CHUNK_SIZE` values.
+	"""
+	md = numpy.asarray(md, dtype=numpy.float64)[..., numpy.newaxis]
+
+	total = numpy.zeros(diff.shape[:-1])
+	step = max(1, CHUNK_SIZE // max(1, diff[..., 0].size))
+
+	for start in range(0, diff.shape[-1], step):
+		chunk = diff[..., start:start + step] - md
+		chunk *= chunk
+
+		total += numpy.sum(chunk, axis=-1, where=True if where is None else where[..., start:start + step])
+
+	if total.ndim == 0:
+		return float(total)
+
+	return total
+
+
+def _completePairs(data1, data2, missingData):
+	"""
+	Coerce *data1* and *data2* to arrays, and find the pairs where neither value is NaN or masked, by *missingData*.
+
+	- 'propagate' do not check for missing values, NaNs propagate to the statistics and masks are ignored
+	- 'drop' exclude incomplete pairs
+	- 'raise' raise a :py:exc:`ValueError` if any pair is incomplete
+
+	The data of masked arrays are returned without copying, with their masks combined into the validity mask.
+
+	:return: Tuple of the data as arrays, and a boolean mask of complete pairs, or ``None`` if every pair is complete or *missingData* is 'propagate'
+	"""
+	if missingData.lower() not in ('propagate', 'drop', 'raise'):
+		raise NotImplementedError(f"'{missingData}' is not a valid way of handling missing data.")
+
+	if missingData.lower() == 'propagate':
+		return numpy.asarray(data1), numpy.asarray(data2), None
+
+	mask1 = numpy.ma.getmask(data1)
+	mask2 = numpy.ma.getmask(data2)
+
+	data1 = numpy.asarray(numpy.ma.getdata(data1))
+	data2 = numpy.asarray(numpy.ma.getdata(data2))
+
+	if data1.shape != data2.shape:
+		return data1, data2, None
+
+	invalid = numpy.isnan(data1)
+	invalid |= numpy.isnan(data2)
+	invalid |= mask1
+	invalid |= mask2
+
+	if not invalid.any():
+		return data1, data2, None
+
+	if missingData.lower() == 'raise':
+		raise ValueError(f'{numpy.count_nonzero(invalid)} pairs have missing values.')
+
+	return data1, data2, ~invalid
+
+
+def _repeatedMeasuresSD(diff, subjects):
+	"""
+	Calculate the standard deviation of differences measured repeatedly in each subject, where the true value may vary between measurements, as described by Bland & Altman [#]_.
+
+	Within and between-subject variances are estimated by one-way analysis of variance of the differences by subject, with sums over each subject accumulated by :py:func:`numpy.bincount`. A negative estimate of the between-subject variance is taken as zero.
+
+	:param numpy.array diff: Differences between methods
+	:param numpy.array subjects: Subject each difference was measured in
+	:return: Tuple of the standard deviation of a single difference, and the number of subjects
+	:rtype: (float, int)
+
+	.. [#] Bland, J. M., and Altman, D. G. “Agreement between methods of measurement with multiple observations per individual” Journal of Biopharmaceutical Statistics, vol. 17, no. 4, 2007, pp. 571–582. `DOI <https://doi.org/10.1080/10543400701329422>`_.
+	"""
+	subjects, subjectIndex = numpy.unique(subjects, return_inverse=True)
+
+	nSubjects = len(subjects)
+	n = len(diff)
+
+	if nSubjects < 2:
+		raise ValueError(f'At least two subjects are required, {nSubjects} provided.')
+
+	counts = numpy.bincount(subjectIndex)
+	subjectMeans = numpy.bincount(subjectIndex, weights=diff) / counts
+
+	md = numpy.mean(diff)
+
+	ssWithin = numpy.sum((diff - subjectMeans[subjectIndex])**2)
+	ssBetween = numpy.sum(counts * (subjectMeans - md)**2)
+
+	# With a single measurement of each subject there is no within-subject variation to estimate
+	msWithin = ssWithin / (n - nSubjects) if n > nSubjects else 0.
+	msBetween = ssBetween / (nSubjects - 1)
+
+	divisor = (n**2 - numpy.sum(counts**2)) / ((nSubjects - 1) * n)
+
+	varianceBetween = max((msBetween - msWithin) / divisor, 0.)
+
+	return numpy.sqrt(varianceBetween + msWithin), nSubjects
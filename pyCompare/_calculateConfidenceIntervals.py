@@ -1,23 +1,33 @@
+import atexit
 import numpy
-from scipy import stats
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from itertools import repeat
+from functools import partial
 
-from ._carkeetCIest import carkeetCIest
+from ._carkeetCache import lookupCarkeetCIest, storeCarkeetCIest, INTEGRATION_METHOD
+from ._profiling import timed, count
 
-def calculateConfidenceIntervals(md, sd, n, limitOfAgreement, confidenceInterval, confidenceIntervalMethod):
+@timed('confidenceIntervals')
+def calculateConfidenceIntervals(md, sd, n, limitOfAgreement, confidenceInterval, confidenceIntervalMethod, diff=None):
 	"""
 	Calculate confidence intervals on the mean difference and limits of agreement.
 
-	Two methods are supported, the approximate method descibed by Bland & Altman, and the exact paired method described by Carket.
+	Three methods are supported, the approximate method descibed by Bland & Altman, the exact paired method described by Carket, and 'bootstrap', which takes percentile intervals of the statistics of *diff* resampled with replacement, as configured by :py:func:`setBootstrapOptions`.
 
-	:param float md:
-	:param float sd:
-	:param int n: Number of paired observations
+	*md* and *sd* may be arrays of statistics from several method pairs, in which case the bounds are returned as arrays. *n* may be an array giving the number of pairs in each, where missing pairs have been excluded.
+
+	:param md:
+	:type md: float or numpy.array
+	:param sd:
+	:type sd: float or numpy.array
+	:param n: Number of paired observations
+	:type n: int or numpy.array
 	:param float limitOfAgreement:
 	:param float confidenceInterval: Calculate confidence intervals over this range
 	:param str confidenceIntervalMethod: Algorithm to calculate CIs
+	:param diff: Differences *md* and *sd* were calculated from, with a row per method pair if 2-D, required by the bootstrap method
+	:type diff: None or numpy.array
 	"""
+	from scipy import stats
+
 	confidenceIntervals = dict()
 
 	if not (confidenceInterval < 99.9) & (confidenceInterval > 1):
@@ -29,7 +39,15 @@ def calculateConfidenceIntervals(md, sd, n, limitOfAgreement, confidenceInterval
 
 	if confidenceIntervalMethod.lower() == 'exact paired':
 
-		coeffs = parallelCarkeetCIest(n, confidenceInterval, limitOfAgreement)
+		if numpy.ndim(n):
+			# Coefficients for every distinct number of pairs, calculated as one batch
+			ns, index = numpy.unique(n, return_inverse=True)
+			jobs = [(int(m), gamma, limitOfAgreement) for m in ns for gamma in [(1 - confidenceInterval) / 2., 1 - (1 - confidenceInterval) / 2.]]
+
+			coeffs = numpy.reshape(batchCarkeetCIest(jobs), (len(ns), 2))[index.ravel()].T
+
+		else:
+			coeffs = parallelCarkeetCIest(n, confidenceInterval, limitOfAgreement)
 
 		coefInner = coeffs[0]
 		coefOuter = coeffs[1]
@@ -51,19 +69,237 @@ def calculateConfidenceIntervals(md, sd, n, limitOfAgreement, confidenceInterval
 		confidenceIntervals['lowerLoA'] = ((md - limitOfAgreement*sd) + loARange,
 										   (md - limitOfAgreement*sd) - loARange)
 
+	elif confidenceIntervalMethod.lower() == 'bootstrap':
+
+		if diff is None:
+			raise ValueError('The differences between methods are required to calculate bootstrap confidence intervals.')
+
+		diff = numpy.asarray(diff)
+
+		if diff.ndim == 1:
+			if n < diff.size:
+				# Missing pairs are held as NaN
+				diff = diff[~numpy.isnan(diff)]
+
+			confidenceIntervals = bootstrapConfidenceIntervals(diff, limitOfAgreement, confidenceInterval)
+
+		else:
+			if numpy.ndim(n):
+				# Missing pairs are held as NaN in each row
+				diff = [row[~numpy.isnan(row)] for row in diff]
+
+			rows = [bootstrapConfidenceIntervals(row, limitOfAgreement, confidenceInterval) for row in diff]
+
+			for key in ['mean', 'upperLoA', 'lowerLoA']:
+				confidenceIntervals[key] = (numpy.array([row[key][0] for row in rows]),
+											numpy.array([row[key][1] for row in rows]))
+
 	else:
 		raise NotImplementedError(f"'{confidenceIntervalMethod}' is not an valid method of calculating confidance intervals")
 	
 	return confidenceIntervals
 
 
+##
+# Settings for bootstrap confidence intervals
+##
+_bootstrapResamples = 2000
+_bootstrapSeed = None
+_bootstrapWorkers = None
+_bootstrapBlockBytes = 64 * 2**20
+
+
+def setBootstrapOptions(resamples=2000, seed=None, maxWorkers=None, maxBlockBytes=64 * 2**20):
+	"""
+	Configure how bootstrap confidence intervals are calculated.
+
+	Resamples are drawn in blocks, as a matrix of indices into the differences, so that the statistics of every resample in a block are calculated with a single reduction along each row. Each block is drawn by its own generator, spawned from *seed*, and blocks are shared between a pool of threads. For a given *seed*, results are the same however many threads are used.
+
+	:param int resamples: Number of resamples to draw
+	:param seed: Seed for resampling, if ``None`` fresh entropy is drawn for each calculation
+	:type seed: None or int
+	:param maxWorkers: Number of threads to calculate blocks in, defaults to the number of processors
+	:type maxWorkers: None or int
+	:param int maxBlockBytes: Largest amount of memory to use for the indices and values of a block of resamples, as each thread holds a block at once, peak memory is up to *maxWorkers* times this
+	"""
+	global _bootstrapResamples, _bootstrapSeed, _bootstrapWorkers, _bootstrapBlockBytes
+
+	if not resamples >= 1:
+		raise ValueError(f'"resamples" must be a number greater than zero, "{resamples}" provided.')
+
+	_bootstrapResamples = resamples
+	_bootstrapSeed = seed
+	_bootstrapWorkers = maxWorkers
+	_bootstrapBlockBytes = maxBlockBytes
+
+
+def bootstrapConfidenceIntervals(diff, limitOfAgreement, confidenceInterval):
+	"""
+	Calculate percentile bootstrap confidence intervals on the mean difference and limits of agreement of *diff*.
+
+	:param numpy.array diff: Differences between methods
+	:param float limitOfAgreement:
+	:param float confidenceInterval: Calculate confidence intervals over this range, as a fraction
+	"""
+	from concurrent.futures import ThreadPoolExecutor
+
+	diff = numpy.asarray(diff, dtype=float)
+	n = diff.size
+
+	# Each resample needs an int64 index and a float64 value per difference
+	blockSize = int(max(1, min(_bootstrapResamples, _bootstrapBlockBytes // (16 * n))))
+	counts = [min(blockSize, _bootstrapResamples - start) for start in range(0, _bootstrapResamples, blockSize)]
+	seeds = numpy.random.SeedSequence(_bootstrapSeed).spawn(len(counts))
+
+	count('bootstrap.resamples', _bootstrapResamples)
+	count('bootstrap.blocks', len(counts))
+
+	if len(counts) > 1:
+		with ThreadPoolExecutor(max_workers=_bootstrapWorkers) as pool:
+			blocks = list(pool.map(partial(_bootstrapBlock, diff), counts, seeds))
+	else:
+		blocks = [_bootstrapBlock(diff, counts[0], seeds[0])]
+
+	md = numpy.concatenate([block[0] for block in blocks])
+	sd = numpy.concatenate([block[1] for block in blocks])
+
+	quantiles = [(1 - confidenceInterval) / 2, (1 + confidenceInterval) / 2]
+
+	confidenceIntervals = dict()
+	confidenceIntervals['mean'] = tuple(numpy.quantile(md, quantiles))
+	confidenceIntervals['upperLoA'] = tuple(numpy.quantile(md + limitOfAgreement * sd, quantiles))
+	confidenceIntervals['lowerLoA'] = tuple(numpy.quantile(md - limitOfAgreement * sd, quantiles))
+
+	return confidenceIntervals
+
+
+def _bootstrapBlock(diff, nResamples, seed):
+	"""
+	Draw *nResamples* resamples of *diff* and return the mean and standard deviation of each.
+	"""
+	rng = numpy.random.default_rng(seed)
+
+	resamples = diff[rng.integers(0, diff.size, size=(nResamples, diff.size))]
+
+	return numpy.mean(resamples, axis=1), numpy.std(resamples, axis=1)
+
+
+##
+# Executor used to calculate Carkeet coefficients, created on first use and reused between calls
+##
+_executor = None
+_executorKind = 'process'
+_executorWorkers = 2
+
+
+def setCarkeetExecutor(executor='process', maxWorkers=2):
+	"""
+	Configure how Carkeet coefficients missing from the cache are calculated.
+
+	*executor* may be:
+	- 'process' calculate in a pool of worker processes
+	- 'thread' calculate in a pool of threads
+	- ``None`` calculate serially in the calling process
+	- An instance of :py:class:`concurrent.futures.Executor`, which remains the responsibility of the caller to shut down
+
+	Pools are created on first use and reused until reconfigured or :py:func:`shutdownCarkeetExecutor` is called.
+
+	:param executor: Executor to use
+	:type executor: None, str, or concurrent.futures.Executor
+	:param int maxWorkers: Number of workers in pools created by pyCompare
+	"""
+	global _executorKind, _executorWorkers
+	from concurrent.futures import Executor
+
+	if not ((executor is None) or isinstance(executor, (str, Executor))):
+		raise TypeError(f"'executor' must be 'process', 'thread', None, or a concurrent.futures.Executor, {type(executor).__name__} provided.")
+
+	if isinstance(executor, str) and (executor.lower() not in ('process', 'thread')):
+		raise NotImplementedError(f"'{executor}' is not a valid executor.")
+
+	shutdownCarkeetExecutor()
+
+	_executorKind = executor
+	_executorWorkers = maxWorkers
+
+
+def shutdownCarkeetExecutor(wait=True):
+	"""
+	Shut down any pool created by pyCompare to calculate Carkeet coefficients. A new pool is created if needed later.
+
+	:param bool wait: If ``True`` wait for pending calculations to finish
+	"""
+	global _executor
+
+	if _executor is not None:
+		_executor.shutdown(wait=wait)
+		_executor = None
+
+atexit.register(shutdownCarkeetExecutor)
+
+
+def _getExecutor():
+	global _executor
+	from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+	if (_executorKind is None) or isinstance(_executorKind, Executor):
+		return _executorKind
+
+	if _executor is None:
+		if _executorKind.lower() == 'process':
+			_executor = ProcessPoolExecutor(max_workers=_executorWorkers)
+		else:
+			_executor = ThreadPoolExecutor(max_workers=_executorWorkers)
+
+	return _executor
+
+
+def batchCarkeetCIest(jobs):
+	"""
+	Calculate Carkeet coefficients for many (n, gamma, limitOfAgreement) jobs at once.
+
+	Coefficients are taken from the cache where available, the remaining unique jobs are distributed over the executor set by :py:func:`setCarkeetExecutor`.
+
+	:param jobs: Iterable of (n, gamma, limitOfAgreement) tuples
+	:return: Coefficient for each job, in order
+	:rtype: list
+	"""
+	jobs = list(jobs)
+
+	coeffs = [lookupCarkeetCIest(*job) for job in jobs]
+
+	missing = list(dict.fromkeys(job for job, coeff in zip(jobs, coeffs) if coeff is None))
+
+	count('carkeetCIest.cached', len(jobs) - sum(coeff is None for coeff in coeffs))
+	count('carkeetCIest.solved', len(missing))
+
+	if missing:
+		from ._carkeetCIest import carkeetCIest
+
+		calculate = partial(carkeetCIest, integrationMethod=INTEGRATION_METHOD)
+		ns, gammas, limitsOfAgreement = zip(*missing)
+
+		executor = _getExecutor()
+		if executor is None:
+			results = map(calculate, ns, gammas, limitsOfAgreement)
+		else:
+			results = executor.map(calculate, ns, gammas, limitsOfAgreement)
+
+		calculated = dict(zip(missing, results))
+
+		for job, result in calculated.items():
+			storeCarkeetCIest(*job, result)
+
+		coeffs = [calculated[job] if coeff is None else coeff for job, coeff in zip(jobs, coeffs)]
+
+	return coeffs
+
+
 ##
 # Split out so we can mock the return value in testing
 # (ProcessPoolExecutor & mock do not play well together so we can't mock carkeetCIest)
 ##
 def parallelCarkeetCIest(n, confidenceInterval, limitOfAgreement): # pragma: no cover
-	coeffs = []
-	with ProcessPoolExecutor(max_workers=2) as executor:
-		for result in executor.map(carkeetCIest, repeat(n), [(1 - confidenceInterval) / 2., 1 - (1 - confidenceInterval) / 2.], repeat(limitOfAgreement)):
-			coeffs.append(result)
-	return coeffs
+
+	return batchCarkeetCIest([(n, (1 - confidenceInterval) / 2., limitOfAgreement),
+							  (n, 1 - (1 - confidenceInterval) / 2., limitOfAgreement)])
@@ -1,8 +1,10 @@
 import numpy
 import warnings
-from scipy import stats
+from scipy import optimize, stats
 
-def carkeetCIest(n, gamma, limitOfAgreement):
+from ._profiling import count
+
+def carkeetCIest(n, gamma, limitOfAgreement, fullOutput=False, integrationMethod='Simpson', tolerance=1e-10):
 	"""
 	Calculate  CI intervals on the paired LoA by the Carkeet method.
 
@@ -10,98 +12,194 @@ def carkeetCIest(n, gamma, limitOfAgreement):
 
 	Position of the limit is calculated as :math:`mean difference + (coefficient * sd of differences)`
 
+	The coefficient is found by Brent's method, starting from a bracket about the coefficient given by the approximate method of Bland & Altman.
+
+	Two methods of evaluating Carkeet's integral are supported:
+	- 'Simpson' uses Carkeet's grid of boxes, which grows as :math:`160\\sqrt{n}`
+	- 'Gauss' uses Gauss-Legendre quadrature over the half-Gaussian weight, doubling the number of nodes (to at most 1024) until successive estimates of gamma at the initial guess agree within *tolerance*, independent of *n*
+
 	:param int n: Number of paired observations
 	:param float gamma: Calculate coefficient for this bound
 	:param float limitOfAgreement: Multiples of SD being considered
+	:param bool fullOutput: If ``True`` also return the number of times the integral was evaluated
+	:param str integrationMethod: Method used to evaluate the integral
+	:param float tolerance: Error tolerance on gamma when using the 'Gauss' method
 	:return: Coefficient determining the (gamma x 100)% confidence interval on the on the SD x limitOfAggreement limit
-	:rtype: float
+	:rtype: float or (float, int)
 	"""
 
 	Degf = n - 1
-	gammaest = 0
-	Kest = 0
-	Kstep = 4
-	directK = 1
-
-	threshold = 1e-8
 
 	p = stats.norm.cdf(limitOfAgreement) - stats.norm.cdf(- limitOfAgreement)
 
-	while numpy.abs(gammaest - gamma) > threshold:
-		Kest = Kest + Kstep
-		K = Kest
-		stepper = 0.05 / n
-		toprange = 8 / (n**0.5) + stepper
-		xdist = numpy.arange(0, toprange, stepper)
-		boxes = len(xdist)
-		boxes = int(numpy.round(boxes / 2 + .1)) * 2 - 1
-		Prchi = numpy.zeros(boxes)
-		Combpdf = numpy.zeros(boxes)
-		halfgauss = numpy.exp(-(n/2) * xdist **2)
-		shrinkfactor = 2 * (n/(2 * numpy.pi)) **.5
-
-		for s in range(boxes - 1):
-			xtest = xdist[s]
-			startp = (0.5 + p/2)
-	
-			resti = stats.norm.ppf(startp) + xtest - .1
-			restiprior = resti
-			phigh = stats.norm.cdf(xtest + resti)
-			plow = stats.norm.cdf(xtest - resti)
-			pesti = phigh - plow
-	
-			pestiprior = pesti
-			resti = resti + .11
-			phigh = stats.norm.cdf(xtest + resti)
-			plow = stats.norm.cdf(xtest - resti)
-			pesti = phigh - plow
-			perror = pesti - p
-			deltap = pesti - pestiprior
-
-			deltaresti = resti - restiprior
-			newresti = resti - perror / deltap * deltaresti
-			restiprior = resti
-
-			resti = newresti
-
-			pestiprior = pesti
-			phigh = stats.norm.cdf(xtest + resti)
-			plow = stats.norm.cdf(xtest - resti)
-			pesti = phigh - plow
-
-			perror = pesti - p
-			while numpy.abs(perror) > 2e-15:
-				deltap = pesti - pestiprior
-
-				deltaresti = resti - restiprior
-				newresti = resti - perror / deltap * deltaresti
-				restiprior = resti
-
-				resti = newresti
-
-				pestiprior = pesti
-				phigh = stats.norm.cdf(xtest + resti)
-				plow = stats.norm.cdf(xtest - resti)
-				pesti = phigh - plow
-
-				perror = pesti - p
-
-			with warnings.catch_warnings():
-				warnings.simplefilter('ignore', RuntimeWarning)
-				chiprob = 1 - stats.chi2.cdf((Degf * resti**2) / (K**2), Degf)
-			Prchi[s] = chiprob
-			Combpdf[s] = chiprob * halfgauss[s]
-
-		Integ = 0
-		for s in range(0, boxes - 2, 2):
-			M = Combpdf[s+1] * stepper * 2
-
-			T = (Combpdf[s] + Combpdf[s+2]) * stepper
-			Integ = Integ + (M*2+T)/ 3 * shrinkfactor
-
-		gammaest = Integ
-		if (gammaest * directK) > (gamma * directK):
-			directK = directK * -1
-			Kstep = - Kstep / 2
-
-	return Kest
+	guess = _approximateCoefficient(n, gamma, limitOfAgreement)
+
+	##
+	# The integration nodes and the half-widths solved at them do not depend on K, so are calculated once
+	##
+	if integrationMethod.lower() == 'simpson':
+		xdist, weights = _simpsonNodes(n)
+		resti = _solveResti(xdist, p)
+
+	elif integrationMethod.lower() == 'gauss':
+		xdist, weights, resti = _gaussNodes(n, p, Degf, max(guess, limitOfAgreement), tolerance)
+
+	else:
+		raise NotImplementedError(f"'{integrationMethod}' is not a valid integration method.")
+
+	evaluated = dict()
+
+	def gammaError(K):
+		if K not in evaluated:
+			evaluated[K] = numpy.dot(weights, _chiProb(resti, K, Degf)) - gamma
+
+		return evaluated[K]
+
+	lower, upper = _bracketRoot(gammaError, guess)
+
+	Kest = optimize.brentq(gammaError, lower, upper, xtol=1e-10)
+
+	count('carkeetCIest.evaluations', len(evaluated))
+	count('carkeetCIest.nodes', len(xdist))
+
+	if fullOutput:
+		return Kest, len(evaluated)
+	else:
+		return Kest
+
+
+def _chiProb(resti, K, Degf):
+	"""
+	Probability the sample SD is small enough for each half-width in *resti* to lie within K SDs of the mean.
+	"""
+	with warnings.catch_warnings():
+		warnings.simplefilter('ignore', RuntimeWarning)
+		return 1 - stats.chi2.cdf((Degf * resti**2) / (K**2), Degf)
+
+
+def _simpsonNodes(n):
+	"""
+	Nodes and weights of Carkeet's Simpson's rule grid, including the half-Gaussian weight.
+	"""
+	stepper = 0.05 / n
+	toprange = 8 / (n**0.5) + stepper
+	xdist = numpy.arange(0, toprange, stepper)
+	boxes = len(xdist)
+	boxes = int(numpy.round(boxes / 2 + .1)) * 2 - 1
+
+	# The final box is left empty, as in Carkeet's reference implementation, so is dropped
+	xdist = xdist[:boxes - 1]
+
+	simpson = numpy.tile([2., 4.], (boxes - 1) // 2)
+	simpson[0] = 1
+
+	halfgauss = numpy.exp(-(n/2) * xdist **2)
+	shrinkfactor = 2 * (n/(2 * numpy.pi)) **.5
+
+	return xdist, simpson * halfgauss * (stepper / 3) * shrinkfactor
+
+
+def _gaussNodes(n, p, Degf, K, tolerance, maxNodes=1024):
+	"""
+	Nodes, weights and half-widths of Gauss-Legendre quadrature over the half-Gaussian weight.
+
+	Integrating in :math:`u = \\sqrt{n}x` over [0, 8] makes the integrand independent of the scale of *n*, the number of nodes is doubled until the estimate of gamma at *K* changes by less than *tolerance*.
+	"""
+	nodes = 16
+	previous = None
+
+	while True:
+		t, w = numpy.polynomial.legendre.leggauss(nodes)
+		u = 4 * (t + 1)
+
+		xdist = u / numpy.sqrt(n)
+		weights = w * 4 * numpy.exp(-u**2 / 2) * 2 / numpy.sqrt(2 * numpy.pi)
+		resti = _solveResti(xdist, p)
+
+		estimate = numpy.dot(weights, _chiProb(resti, K, Degf))
+
+		if ((previous is not None) and (numpy.abs(estimate - previous) <= tolerance)) or (nodes >= maxNodes):
+			return xdist, weights, resti
+
+		previous = estimate
+		nodes = nodes * 2
+
+
+def _approximateCoefficient(n, gamma, limitOfAgreement):
+	"""
+	Coefficient for the (gamma x 100)% bound on the limit of agreement by the approximate method of Bland & Altman.
+	"""
+	seLoA = numpy.sqrt((1/n) + (limitOfAgreement**2 / (2 * (n - 1))))
+
+	return limitOfAgreement + stats.t.ppf(gamma, n - 1) * seLoA
+
+
+def _bracketRoot(fun, guess, factor=1.25):
+	"""
+	Find an interval about *guess* over which the increasing function *fun* changes sign.
+	"""
+	# Coefficients are strictly positive, the approximate method may not be for small n
+	if not guess > 0:
+		guess = 1.
+
+	if fun(guess) < 0:
+		lower = guess
+		upper = guess * factor
+		while fun(upper) < 0:
+			lower = upper
+			upper = upper * factor
+			factor = factor * 2
+	else:
+		upper = guess
+		lower = guess / factor
+		while fun(lower) > 0:
+			upper = lower
+			lower = lower / factor
+			factor = factor * 2
+
+	return lower, upper
+
+
+def _solveResti(xdist, p):
+	"""
+	Find, for every offset in *xdist*, the half-width *r* such that :math:`\\Phi(x + r) - \\Phi(x - r) = p`.
+
+	All offsets are solved together by the secant method, entries are frozen once they have converged.
+
+	:param numpy.array xdist: Offsets of the mean to solve at
+	:param float p: Target probability
+	:return: Half-width for each offset
+	:rtype: numpy.array
+	"""
+	startp = (0.5 + p/2)
+
+	resti = stats.norm.ppf(startp) + xdist - .1
+	restiprior = resti
+	pesti = stats.norm.cdf(xdist + resti) - stats.norm.cdf(xdist - resti)
+
+	pestiprior = pesti
+	resti = resti + .11
+	pesti = stats.norm.cdf(xdist + resti) - stats.norm.cdf(xdist - resti)
+	perror = pesti - p
+
+	# First step is always taken, subsequent steps only while unconverged
+	active = numpy.ones(xdist.shape, dtype=bool)
+
+	while active.any():
+		deltap = pesti[active] - pestiprior[active]
+		deltaresti = resti[active] - restiprior[active]
+
+		newresti = resti[active] - perror[active] / deltap * deltaresti
+
+		restiprior[active] = resti[active]
+		pestiprior[active] = pesti[active]
+		resti[active] = newresti
+
+		x = xdist[active]
+		pesti[active] = stats.norm.cdf(x + newresti) - stats.norm.cdf(x - newresti)
+		perror[active] = pesti[active] - p
+
+		# Stop iterating entries that have converged, or that can make no further progress
+		active[active] = (numpy.abs(perror[active]) > 2e-15) & (pesti[active] != pestiprior[active])
+
+	return resti
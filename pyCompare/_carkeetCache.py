@@ -0,0 +1,196 @@
+import os
+import numpy
+from collections import OrderedDict
+
+##
+# The coefficients returned by carkeetCIest depend only on (n, gamma, limitOfAgreement), so are cached at three levels:
+# - A shipped table of precomputed values for the 90% and 95% CIs on 1.96 SD limits
+# - An in-process LRU cache
+# - An optional on-disk store, enabled by setCarkeetCacheDirectory() or the PYCOMPARE_CACHE_DIR environment variable
+##
+TABLE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'carkeetCoefficients.csv')
+TABLE_LIMITOFAGREEMENT = 1.96
+TABLE_GAMMAS = (0.025, 0.05, 0.95, 0.975)
+TABLE_N = tuple(range(2, 316)) + (350, 400, 450, 500, 600, 700, 800, 1000, 1250, 1500, 2000, 2500, 3000, 4000, 5000, 7500, 10000)
+
+INTERPOLATION_TOLERANCE = 5e-5
+
+# Coefficients missing from the cache are calculated by quadrature, which costs the same at any n
+INTEGRATION_METHOD = 'Gauss'
+
+_table = None
+_memoryCache = OrderedDict()
+_memoryCacheSize = 1024
+_cacheDirectory = os.environ.get('PYCOMPARE_CACHE_DIR')
+
+
+def cachedCarkeetCIest(n, gamma, limitOfAgreement, interpolate=True):
+	"""
+	Return the Carkeet coefficient for (*n*, *gamma*, *limitOfAgreement*), calculating it with :py:func:`carkeetCIest` by ``INTEGRATION_METHOD`` only if it can not be found in the cache.
+
+	:param int n: Number of paired observations
+	:param float gamma: Calculate coefficient for this bound
+	:param float limitOfAgreement: Multiples of SD being considered
+	:param bool interpolate: If ``True`` allow values to be interpolated from the shipped table, see :py:func:`lookupCarkeetCIest`
+	:return: Coefficient determining the (gamma x 100)% confidence interval on the on the SD x limitOfAggreement limit
+	:rtype: float
+	"""
+	coeff = lookupCarkeetCIest(n, gamma, limitOfAgreement, interpolate=interpolate)
+
+	if coeff is None:
+		from ._carkeetCIest import carkeetCIest
+
+		coeff = carkeetCIest(n, gamma, limitOfAgreement, integrationMethod=INTEGRATION_METHOD)
+		storeCarkeetCIest(n, gamma, limitOfAgreement, coeff)
+
+	return coeff
+
+
+def lookupCarkeetCIest(n, gamma, limitOfAgreement, interpolate=True):
+	"""
+	Look up a Carkeet coefficient without calculating it, checking the in-process cache, the shipped table, then the on-disk store.
+
+	Where *limitOfAgreement* and *gamma* are covered by the shipped table but *n* falls between two tabulated values, the coefficient is interpolated linearly in :math:`1/\\sqrt{n}`, and is within ``INTERPOLATION_TOLERANCE`` (5e-5) of the calculated value. Tabulated values of *n* are returned as calculated.
+
+	:param int n: Number of paired observations
+	:param float gamma: Calculate coefficient for this bound
+	:param float limitOfAgreement: Multiples of SD being considered
+	:param bool interpolate: If ``False`` only return values calculated for exactly this *n*
+	:return: The coefficient, or ``None`` if it is not available
+	:rtype: float or None
+	"""
+	key = _cacheKey(n, gamma, limitOfAgreement)
+
+	if key in _memoryCache:
+		_memoryCache.move_to_end(key)
+		return _memoryCache[key]
+
+	coeff = _lookupTable(*key, interpolate)
+
+	if coeff is None:
+		coeff = _readDisk(key)
+
+	if coeff is not None:
+		_remember(key, coeff)
+
+	return coeff
+
+
+def storeCarkeetCIest(n, gamma, limitOfAgreement, coeff):
+	"""
+	Add a calculated coefficient to the in-process cache, and the on-disk store if enabled.
+	"""
+	key = _cacheKey(n, gamma, limitOfAgreement)
+
+	_remember(key, coeff)
+	_writeDisk(key, coeff)
+
+
+def setCarkeetCacheDirectory(path):
+	"""
+	Persist calculated Carkeet coefficients to *path*, or disable the on-disk store if ``None``.
+
+	Defaults to the value of the ``PYCOMPARE_CACHE_DIR`` environment variable.
+
+	:param path: Directory to store coefficients in, created if it does not exist
+	:type path: None or str
+	"""
+	global _cacheDirectory
+
+	if path is not None:
+		os.makedirs(path, exist_ok=True)
+
+	_cacheDirectory = path
+
+
+def clearCarkeetCache():
+	"""
+	Empty the in-process cache. The shipped table and on-disk store are unaffected.
+	"""
+	_memoryCache.clear()
+
+
+def _cacheKey(n, gamma, limitOfAgreement):
+
+	# Round away representation error, so that e.g. (1 - 0.95) / 2 matches 0.025
+	return (int(n), round(float(gamma), 12), round(float(limitOfAgreement), 12))
+
+
+def _remember(key, coeff):
+
+	_memoryCache[key] = coeff
+	_memoryCache.move_to_end(key)
+
+	while len(_memoryCache) > _memoryCacheSize:
+		_memoryCache.popitem(last=False)
+
+
+def _lookupTable(n, gamma, limitOfAgreement, interpolate):
+	global _table
+
+	if (limitOfAgreement != TABLE_LIMITOFAGREEMENT) or (gamma not in TABLE_GAMMAS):
+		return None
+
+	if _table is None:
+		_table = numpy.loadtxt(TABLE_PATH, delimiter=',', skiprows=1, ndmin=2)
+
+	tableN = _table[:, 0]
+	column = _table[:, TABLE_GAMMAS.index(gamma) + 1]
+
+	i = numpy.searchsorted(tableN, n)
+
+	if i == len(tableN):
+		return None
+	elif tableN[i] == n:
+		return float(column[i])
+	elif (not interpolate) or (i == 0):
+		return None
+
+	weight = (n**-0.5 - tableN[i-1]**-0.5) / (tableN[i]**-0.5 - tableN[i-1]**-0.5)
+
+	return float((1 - weight) * column[i-1] + weight * column[i])
+
+
+def _diskPath(key):
+
+	return os.path.join(_cacheDirectory, 'carkeet_{0}_{1!r}_{2!r}.txt'.format(*key))
+
+
+def _readDisk(key):
+
+	if _cacheDirectory is None:
+		return None
+
+	try:
+		with open(_diskPath(key), 'r') as file:
+			return float(file.readline())
+	except (OSError, ValueError):
+		return None
+
+
+def _writeDisk(key, coeff):
+
+	if _cacheDirectory is None:
+		return
+
+	path = _diskPath(key)
+	tmpPath = f'{path}.{os.getpid()}.tmp'
+
+	# Write then rename so concurrent readers never see a partial file
+	with open(tmpPath, 'w') as file:
+		file.write(repr(float(coeff)))
+	os.replace(tmpPath, path)
+
+
+def _generateTable(path=TABLE_PATH): # pragma: no cover
+	"""
+	Regenerate the shipped table of coefficients.
+	"""
+	from ._carkeetCIest import carkeetCIest
+
+	with open(path, 'w') as file:
+		file.write(','.join(['n'] + [repr(gamma) for gamma in TABLE_GAMMAS]) + '\n')
+
+		for n in TABLE_N:
+			coeffs = [carkeetCIest(n, gamma, TABLE_LIMITOFAGREEMENT) for gamma in TABLE_GAMMAS]
+			file.write(','.join([str(n)] + [repr(float(coeff)) for coeff in coeffs]) + '\n')
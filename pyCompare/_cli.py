@@ -0,0 +1,252 @@
+"""
+Command line interface, installed as the ``pycompare`` console script.
+"""
+import os
+import re
+import sys
+import csv
+import time
+import argparse
+
+import numpy
+
+# Statistics written for each comparison, after the columns identifying it
+STATISTICS = ('n', 'nDropped', 'md', 'sd', 'lowerLoA', 'upperLoA',
+			  'meanCILower', 'meanCIUpper', 'lowerLoACILower', 'lowerLoACIUpper', 'upperLoACILower', 'upperLoACIUpper',
+			  'slope', 'slopeErr', 'plot', 'seconds', 'error')
+
+
+def main(argv=None):
+	"""
+	Compare pairs of columns of CSV or Parquet files, optionally within groups of rows, and write a table of the statistics of each comparison.
+
+	Comparisons are calculated in a pool of worker processes, which import the plotting code only if plots are requested.
+
+	:param argv: Command line arguments, if ``None`` those the interpreter was started with
+	:type argv: None or list of str
+	:return: Exit status, 1 if any comparison failed and 0 otherwise
+	:rtype: int
+	"""
+	args = _parser().parse_args(argv)
+
+	if args.plots is not None:
+		os.makedirs(args.plots, exist_ok=True)
+
+	jobs = list(_readJobs(args))
+
+	if (args.workers == 1) or (len(jobs) < 2):
+		results = [_runJob(job) for job in jobs]
+
+	else:
+		from concurrent.futures import ProcessPoolExecutor
+
+		with ProcessPoolExecutor(max_workers=args.workers) as executor:
+			results = list(executor.map(_runWorkerJob, jobs))
+
+	groupBy = args.group_by or []
+	fieldnames = ['file', 'method1', 'method2'] + groupBy + list(STATISTICS)
+
+	if args.output == '-':
+		_writeTable(sys.stdout, fieldnames, jobs, results)
+	else:
+		with open(args.output, 'w', newline='') as file:
+			_writeTable(file, fieldnames, jobs, results)
+
+	return int(any(result['error'] for result in results))
+
+
+def _parser():
+
+	parser = argparse.ArgumentParser(prog='pycompare',
+									 description='Calculate Bland-Altman statistics, and optionally plots, comparing pairs of columns of CSV or Parquet files.')
+
+	parser.add_argument('inputs', nargs='+', metavar='INPUT', help='.csv or .parquet file to read')
+	parser.add_argument('-c', '--columns', nargs=2, action='append', required=True, metavar=('METHOD1', 'METHOD2'), help='columns holding a pair of methods to compare, may be repeated')
+	parser.add_argument('-g', '--group-by', nargs='+', metavar='COLUMN', help='compare each pair of methods separately within each group of rows sharing values of these columns')
+	parser.add_argument('-o', '--output', default='-', help='write the results table, as CSV, to this path (defaults to standard output)')
+	parser.add_argument('-p', '--plots', metavar='DIRECTORY', help='save a plot of each comparison into this directory')
+	parser.add_argument('-j', '--workers', type=int, help='number of worker processes (defaults to the number of processors, 1 calculates in this process)')
+
+	statistics = parser.add_argument_group('statistics', 'as for pyCompare.blandAltman')
+	statistics.add_argument('--limit-of-agreement', type=float, default=1.96)
+	statistics.add_argument('--confidence-interval', type=float, default=95, help='percentage confidence interval, 0 to skip')
+	statistics.add_argument('--confidence-interval-method', default='approximate', choices=['approximate', 'exact paired', 'bootstrap'])
+	statistics.add_argument('--limit-of-agreement-method', default='parametric', choices=['parametric', 'nonparametric', 'regression'])
+	statistics.add_argument('--detrend', choices=['Linear', 'ODR', 'Deming'])
+	statistics.add_argument('--percentage', action='store_true', help='calculate differences as percentages')
+	statistics.add_argument('--missing-data', default='drop', choices=['drop', 'raise', 'propagate'], help='how to handle pairs with a missing value (defaults to drop)')
+
+	plots = parser.add_argument_group('plots')
+	plots.add_argument('--figure-format', default='png')
+	plots.add_argument('--figure-size', type=float, nargs=2, default=(10, 7), metavar=('WIDTH', 'HEIGHT'))
+	plots.add_argument('--dpi', type=int, default=72)
+
+	return parser
+
+
+def _readJobs(args):
+	"""
+	Read the columns needed from each input, and yield a job for each pair of columns, and group of rows if grouping.
+	"""
+	groupBy = args.group_by or []
+	methods = list(dict.fromkeys(column for pair in args.columns for column in pair))
+	needed = methods + [column for column in groupBy if column not in methods]
+
+	# Plot names already used, as distinct groups may share a name once unsafe characters are replaced
+	plotNames = set()
+
+	options = dict(limitOfAgreement=args.limit_of_agreement,
+				   confidenceInterval=args.confidence_interval or None,
+				   confidenceIntervalMethod=args.confidence_interval_method,
+				   limitOfAgreementMethod=args.limit_of_agreement_method,
+				   detrend=args.detrend,
+				   percentage=args.percentage,
+				   missingData=args.missing_data)
+
+	for path in args.inputs:
+		frame = _readFrame(path, needed)
+		values = {column: frame[column].to_numpy(dtype=float) for column in methods}
+
+		if groupBy:
+			# Rows missing a group key are compared as a group of their own
+			groups = frame.groupby(groupBy, sort=True, dropna=False).indices.items()
+		else:
+			groups = [((), slice(None))]
+
+		for key, index in groups:
+			key = key if isinstance(key, tuple) else (key,)
+
+			for method1, method2 in args.columns:
+				job = dict(options)
+				job['labels'] = {'file': path, 'method1': method1, 'method2': method2, **dict(zip(groupBy, key))}
+				job['data1'] = values[method1][index]
+				job['data2'] = values[method2][index]
+
+				if args.plots is not None:
+					parts = [os.path.splitext(os.path.basename(path))[0], method1, method2] + [str(value) for value in key]
+
+					name = stem = _slug('_'.join(parts))
+					suffix = 1
+					while name in plotNames:
+						name = f'{stem}-{suffix}'
+						suffix += 1
+					plotNames.add(name)
+
+					job['savePath'] = os.path.join(args.plots, name + '.' + args.figure_format)
+					job['title'] = ' '.join(parts[1:3]) + ''.join(f', {column} {value}' for column, value in zip(groupBy, key))
+					job['figureSize'] = tuple(args.figure_size)
+					job['dpi'] = args.dpi
+					job['figureFormat'] = args.figure_format
+
+				yield job
+
+
+def _readFrame(path, columns):
+	"""
+	Read *columns* of a .csv or .parquet file into a :py:class:`pandas.DataFrame`.
+	"""
+	import pandas
+
+	extension = os.path.splitext(path)[1].lower()
+
+	if extension == '.csv':
+		return pandas.read_csv(path, usecols=columns)
+
+	elif extension in ('.parquet', '.pq'):
+		try:
+			import pyarrow.parquet
+		except ImportError as e: # pragma: no cover
+			raise ImportError('Reading .parquet files requires pyarrow to be installed.') from e
+
+		return pyarrow.parquet.read_table(path, columns=columns).to_pandas()
+
+	else:
+		raise NotImplementedError(f"'{extension}' is not a supported file type, use .csv or .parquet.")
+
+
+def _runJob(job):
+	"""
+	Calculate the statistics of a single comparison, drawing its plot if it has a *savePath*, returning them as a row of the results table with any error raised as a string.
+	"""
+	from ._blandAltmanStatistics import blandAltmanStatistics
+
+	job = dict(job)
+	job.pop('labels')
+
+	start = time.perf_counter()
+	row = {'plot': job.get('savePath')}
+
+	try:
+		if 'savePath' in job:
+			from ._blandAltmanBatch import _renderToFile
+
+			result = _renderToFile(**job)
+
+		else:
+			result = blandAltmanStatistics(**job)
+
+		row.update(_resultRow(result))
+		row['error'] = None
+
+	except Exception as e:
+		row['error'] = f'{type(e).__name__}: {e}'
+
+	row['seconds'] = time.perf_counter() - start
+
+	return row
+
+
+def _runWorkerJob(job):
+	"""
+	Run *job* in a worker process, solving any Carkeet coefficients in the worker itself, as workers are already separate processes.
+	"""
+	from ._calculateConfidenceIntervals import setCarkeetExecutor
+
+	setCarkeetExecutor(None)
+
+	return _runJob(job)
+
+
+def _resultRow(result):
+
+	row = {'n': result.n, 'nDropped': result.nDropped, 'md': result.md, 'sd': result.sd, 'lowerLoA': result.lowerLoA, 'upperLoA': result.upperLoA, 'slope': result.slope, 'slopeErr': result.slopeErr}
+
+	for key, name in [('mean', 'meanCI'), ('lowerLoA', 'lowerLoACI'), ('upperLoA', 'upperLoACI')]:
+		if key in result.confidenceIntervals:
+			row[name + 'Lower'], row[name + 'Upper'] = result.confidenceIntervals[key]
+
+	return row
+
+
+def _writeTable(file, fieldnames, jobs, results):
+
+	writer = csv.DictWriter(file, fieldnames=fieldnames, restval='')
+	writer.writeheader()
+
+	for job, result in zip(jobs, results):
+		row = {**job['labels'], **result}
+
+		writer.writerow({key: _cell(value) for key, value in row.items()})
+
+
+def _cell(value):
+	"""
+	Format *value* for the results table, with numpy scalars as plain numbers, floats at full precision, and ``None`` as empty.
+	"""
+	if value is None:
+		return ''
+
+	if isinstance(value, (float, numpy.floating)):
+		return repr(float(value))
+
+	if isinstance(value, numpy.integer):
+		return int(value)
+
+	return value
+
+
+def _slug(text):
+	"""
+	Replace characters that are not safe in file names.
+	"""
+	return re.sub(r'[^A-Za-z0-9._-]+', '-', text)
@@ -1,21 +1,54 @@
 import numpy
-from scipy import stats
 
+from ._profiling import timed
+
+@timed('detrend')
 def detrend(method, data1, data2):
 	"""
 	Model and remove a mutiplicative offset between data1 and data2 by method
 
+	If *data1* and *data2* are 2-D arrays, each row is detrended independently and *slope* and *slopeErr* are returned as arrays.
+
+	'Deming' fits the slope by Deming regression [#]_ in closed form, with the standard error of the slope estimated by the jackknife. As in 'ODR', which weights each method by the inverse of its variance, the ratio of the error variances of the methods is taken as the ratio of their variances, so both find the same slope. Unlike 'ODR', which runs an iterative solver per fit, every leave-one-out fit is calculated from sums of the data, so batches of many rows are detrended at once. As only the slope is removed, the intercept is not calculated.
+
 	:param method: Detrending method to use 
 	:type method: None or str
 	:param numpy.array data1: Array of first measures
 	:param numpy.array data2: Array of second measures
+
+	.. [#] Linnet, K. "Evaluation of regression procedures for methods comparison studies" Clinical Chemistry, vol. 39, no. 3, 1993, pp. 424–432. `DOI <https://doi.org/10.1093/clinchem/39.3.424>`_.
 	"""
 
 	slope = slopeErr = None
 
 	if method is None:
 		pass
+	elif method.lower() == 'deming':
+		slope, slopeErr = _demingRows(numpy.asarray(data1, dtype=float), numpy.asarray(data2, dtype=float))
+
+		if numpy.ndim(data1) == 2:
+			data2 = data2 / slope[:, numpy.newaxis]
+		else:
+			slope = float(slope)
+			slopeErr = float(slopeErr)
+
+			data2 = data2 / slope
+
+	elif numpy.ndim(data1) == 2:
+		if method.lower() == 'linear':
+			slope, slopeErr = _linregressRows(data1, data2)
+			data2 = data2 / slope[:, numpy.newaxis]
+
+		else:
+			detrended = [detrend(method, row1, row2) for row1, row2 in zip(data1, data2)]
+
+			data2 = numpy.array([row[0] for row in detrended])
+			slope = numpy.array([row[1] for row in detrended])
+			slopeErr = numpy.array([row[2] for row in detrended])
+
 	elif method.lower() == 'linear':
+		from scipy import stats
+
 		reg = stats.linregress(data1, data2)
 
 		slope = reg.slope
@@ -45,3 +78,72 @@ def detrend(method, data1, data2):
 		raise NotImplementedError(f"'{detrend}' is not a valid detrending method.")
 
 	return data2, slope, slopeErr
+
+
+def _linregressRows(data1, data2):
+	"""
+	Least squares slope, and its standard error, of data2 on data1 for every row, matching :py:func:`scipy.stats.linregress`.
+	"""
+	n = data1.shape[-1]
+
+	xm = data1 - numpy.mean(data1, axis=-1, keepdims=True)
+	ym = data2 - numpy.mean(data2, axis=-1, keepdims=True)
+
+	ssxm = numpy.einsum('ij,ij->i', xm, xm)
+	ssym = numpy.einsum('ij,ij->i', ym, ym)
+	ssxym = numpy.einsum('ij,ij->i', xm, ym)
+
+	slope = ssxym / ssxm
+
+	r = numpy.clip(ssxym / numpy.sqrt(ssxm * ssym), -1, 1)
+	slopeErr = numpy.sqrt((1 - r**2) * ssym / ssxm / (n - 2))
+
+	return slope, slopeErr
+
+
+def _demingRows(data1, data2):
+	"""
+	Deming slope of data2 on data1, with the ratio of error variances taken as the ratio of the variances of each sample, and its jackknife standard error, along the last axis.
+
+	The centred sums of each leave-one-out sample are found by removing the contribution of the omitted pair from the sums of the whole sample, so all *n* jackknife fits are calculated without copying the data.
+	"""
+	n = data1.shape[-1]
+
+	xm = data1 - numpy.mean(data1, axis=-1, keepdims=True)
+	ym = data2 - numpy.mean(data2, axis=-1, keepdims=True)
+
+	ssxm = numpy.sum(xm * xm, axis=-1)
+	ssym = numpy.sum(ym * ym, axis=-1)
+	ssxym = numpy.sum(xm * ym, axis=-1)
+
+	slope = _demingSlope(ssxm, ssym, ssxym, ssym / ssxm)
+
+	##
+	# Jackknife
+	##
+	scale = n / (n - 1)
+
+	jackknifeSsxm = ssxm[..., numpy.newaxis] - scale * xm * xm
+	jackknifeSsym = ssym[..., numpy.newaxis] - scale * ym * ym
+
+	jackknife = _demingSlope(jackknifeSsxm,
+							 jackknifeSsym,
+							 ssxym[..., numpy.newaxis] - scale * xm * ym,
+							 jackknifeSsym / jackknifeSsxm)
+
+	jackknifeMean = numpy.mean(jackknife, axis=-1, keepdims=True)
+	slopeErr = numpy.sqrt((n - 1) / n * numpy.sum((jackknife - jackknifeMean)**2, axis=-1))
+
+	return slope, slopeErr
+
+
+def _demingSlope(ssxm, ssym, ssxym, ratio):
+	"""
+	Deming slope from the centred sums of squares and products, for *ratio* of the error variance of y to that of x.
+	"""
+	d = ssym - ratio * ssxm
+	root = numpy.sqrt(d**2 + 4 * ratio * ssxym**2)
+
+	# Choose the form that avoids cancellation between d and root
+	with numpy.errstate(divide='ignore', invalid='ignore'):
+		return numpy.where(d >= 0, (d + root) / (2 * ssxym), 2 * ratio * ssxym / (root - d))
@@ -0,0 +1,115 @@
+import numpy
+
+from ._profiling import timed
+
+def nonParametricQuantiles(limitOfAgreement):
+	"""
+	Quantiles of the differences that bound the same proportion of a normal distribution as *limitOfAgreement* standard deviations either side of the mean, 0.025 and 0.975 for the default 1.96.
+
+	:param float limitOfAgreement: Multiples of the standard deviation
+	:return: Tuple of the (lower, upper) quantiles
+	:rtype: (float, float)
+	"""
+	from scipy import stats
+
+	lowerQuantile = stats.norm.cdf(-limitOfAgreement)
+
+	return lowerQuantile, 1 - lowerQuantile
+
+
+@timed('percentileLimits')
+def percentileLimits(diff, limitOfAgreement, confidenceInterval, n=None):
+	"""
+	Calculate limits of agreement at the percentiles of *diff* given by :py:func:`nonParametricQuantiles`, and distribution free confidence intervals on them from the order statistics of *diff*.
+
+	Percentiles are interpolated as by :py:func:`numpy.quantile`, but every order statistic needed is selected by a single call to :py:func:`numpy.partition`, rather than by sorting. If *diff* is 2-D, limits are calculated along each row.
+
+	:param numpy.array diff: Differences between methods
+	:param float limitOfAgreement: Multiples of the standard deviation the limits correspond to
+	:param confidenceInterval: If not ``None``, calculate the specified percentage confidence interval on the limits
+	:type confidenceInterval: None or float
+	:param n: If not ``None``, the number of differences, where *diff* also holds missing differences as NaN, which are partitioned after all others
+	:type n: None or int
+	:return: Tuple of the lower and upper limits of agreement, and a dict of confidence intervals keyed by 'upperLoA' and 'lowerLoA'
+	"""
+	if n is None:
+		n = diff.shape[-1]
+
+	quantiles = nonParametricQuantiles(limitOfAgreement)
+
+	positions = [(n - 1) * quantile for quantile in quantiles]
+	ranks = [int(numpy.floor(position)) for position in positions]
+
+	kth = set()
+	for rank in ranks:
+		kth.update([rank, min(rank + 1, n - 1)])
+
+	if confidenceInterval:
+		intervals = [_rankInterval(n, quantile, confidenceInterval) for quantile in quantiles]
+
+		for interval in intervals:
+			kth.update(interval)
+
+	ordered = numpy.partition(diff, sorted(kth), axis=-1)
+
+	limits = list()
+	for position, rank in zip(positions, ranks):
+		lower = numpy.take(ordered, rank, axis=-1)
+		upper = numpy.take(ordered, min(rank + 1, n - 1), axis=-1)
+
+		limits.append(lower + (position - rank) * (upper - lower))
+
+	confidenceIntervals = dict()
+
+	if confidenceInterval:
+		confidenceIntervals['lowerLoA'] = (numpy.take(ordered, intervals[0][0], axis=-1), numpy.take(ordered, intervals[0][1], axis=-1))
+		confidenceIntervals['upperLoA'] = (numpy.take(ordered, intervals[1][0], axis=-1), numpy.take(ordered, intervals[1][1], axis=-1))
+
+	return limits[0], limits[1], confidenceIntervals
+
+
+def sketchLimits(sketch, limitOfAgreement, confidenceInterval):
+	"""
+	Estimate limits of agreement and their confidence intervals as by :py:func:`percentileLimits`, from a :py:class:`~pyCompare.QuantileSketch` of the differences.
+
+	:param QuantileSketch sketch: Sketch of the differences between methods
+	:param float limitOfAgreement: Multiples of the standard deviation the limits correspond to
+	:param confidenceInterval: If not ``None``, calculate the specified percentage confidence interval on the limits
+	:type confidenceInterval: None or float
+	:return: Tuple of the lower and upper limits of agreement, and a dict of confidence intervals keyed by 'upperLoA' and 'lowerLoA'
+	"""
+	n = sketch.n
+
+	quantiles = nonParametricQuantiles(limitOfAgreement)
+
+	lowerLoA, upperLoA = sketch.quantile(quantiles)
+
+	confidenceIntervals = dict()
+
+	if confidenceInterval:
+		for key, quantile in zip(['lowerLoA', 'upperLoA'], quantiles):
+			interval = numpy.array(_rankInterval(n, quantile, confidenceInterval))
+			# Centre each rank, so that rounding does not select the rank below
+			confidenceIntervals[key] = tuple(sketch.quantile(numpy.minimum((interval + 0.5) / (n - 1), 1)))
+
+	return lowerLoA, upperLoA, confidenceIntervals
+
+
+def _rankInterval(n, quantile, confidenceInterval):
+	"""
+	Zero based ranks of the order statistics bounding the *confidenceInterval* percentage confidence interval on the *quantile* of *n* values, by the normal approximation to the binomial distribution of the number of values below it.
+	"""
+	from scipy import stats
+
+	if not (confidenceInterval < 99.9) & (confidenceInterval > 1):
+		raise ValueError(f'"confidenceInterval" must be a number in the range 1 to 99, "{confidenceInterval}" provided.')
+
+	z = stats.norm.ppf((1 + confidenceInterval / 100.) / 2)
+
+	centre = n * quantile
+	halfWidth = z * numpy.sqrt(n * quantile * (1 - quantile))
+
+	lower = int(numpy.clip(numpy.floor(centre - halfWidth) - 1, 0, n - 1))
+	upper = int(numpy.clip(numpy.ceil(centre + halfWidth) - 1, 0, n - 1))
+
+	return lower, upper
@@ -1,14 +1,16 @@
 import numpy
-import matplotlib.pyplot as plt
-import matplotlib.transforms as transforms
-import matplotlib.ticker as ticker
 import warnings
 
-from ._rangeFrameLocator import rangeFrameLocator, rangeFrameLabler
-from ._detrend import detrend as detrendFun
-from ._calculateConfidenceIntervals import calculateConfidenceIntervals
+from ._profiling import timed, span, count
+from ._blandAltmanStatistics import _blandAltmanStatistics
+from ._nonParametricLimits import nonParametricQuantiles
 
-def blandAltman(data1, data2, limitOfAgreement=1.96, confidenceInterval=95, confidenceIntervalMethod='approximate', percentage=False, detrend=None, title=None, ax=None, figureSize=(10,7), dpi=72, savePath=None, figureFormat='png', meanColour='#6495ED', loaColour='coral', pointColour='#6495ED'):
+# Above this many points, 'auto' point rendering draws a density raster rather than a scatter plot
+DENSITY_THRESHOLD = 100000
+DENSITY_BINS = 200
+
+@timed('blandAltman')
+def blandAltman(data1, data2, limitOfAgreement=1.96, confidenceInterval=95, confidenceIntervalMethod='approximate', percentage=False, detrend=None, title=None, ax=None, figureSize=(10,7), dpi=72, savePath=None, figureFormat='png', meanColour='#6495ED', loaColour='coral', pointColour='#6495ED', pointRendering='auto', subjects=None, limitOfAgreementMethod='parametric', missingData='propagate', out=None):
 	"""
 	blandAltman(data1, data2, limitOfAgreement=1.96, confidenceInterval=None, **kwargs)
 
@@ -17,13 +19,34 @@ def blandAltman(data1, data2, limitOfAgreement=1.96, confidenceInterval=95, conf
 	Confidence intervals on the limit of agreement may be calculated using:
 	- 'exact paired' uses the exact paired method described by Carkeet [#]_
 	- 'approximate' uses the approximate method described by Bland & Altman
+	- 'bootstrap' uses percentile intervals from resampling the paired differences, see :py:func:`~pyCompare.setBootstrapOptions`
 
 	The exact paired method will give more accurate results when the number of paired measurements is low (approx < 100), at the expense of much slower plotting time.
 
+	Where each subject was measured repeatedly, pass the subject of each pair as *subjects*. The limits of agreement are then placed using the standard deviation of a single difference, combining the within and between-subject variance as described by Bland & Altman [#]_, and confidence intervals are calculated from the number of subjects rather than the number of pairs.
+
+	The *limitOfAgreementMethod* option supports the following options:
+	- 'parametric' place the limits of agreement *limitOfAgreement* standard deviations either side of the mean difference
+	- 'regression' model the mean difference and limits of agreement as linear functions of the mean of each pair, by regression of the differences and then of their absolute residuals on the means, as described by Bland & Altman for differences that change, or spread out, with the size of the measurement. Confidence intervals are not calculated for regression-based limits
+	- 'nonparametric' place the limits of agreement at the percentiles of the differences bounding the same proportion of a normal distribution, the 2.5th and 97.5th for the default *limitOfAgreement* of 1.96, for differences that are not normally distributed. Confidence intervals on the limits are then taken from the order statistics of the differences
+
+	To calculate the statistics without plotting, use :py:func:`~pyCompare.blandAltmanStatistics`.
+
 	The *detrend* option supports the following options:
 	- ``None`` do not attempt to detrend data - plots raw values
 	- 'Linear' attempt to model and remove a multiplicative offset between each assay by linear regression
 	- 'ODR' attempt to model and remove a multiplicative offset between each assay by Orthogonal distance regression
+	- 'Deming' attempt to model and remove a multiplicative offset between each assay by Deming regression, calculated in closed form
+
+	The *missingData* option supports the following options:
+	- 'propagate' do not check for missing values, NaNs propagate to the statistics
+	- 'drop' exclude pairs where either value is NaN, or masked in a :py:class:`numpy.ma.MaskedArray`, the number excluded is reported as :py:attr:`~pyCompare.BlandAltmanResult.nDropped`
+	- 'raise' raise a :py:exc:`ValueError` if any pair is incomplete
+
+	The *pointRendering* option supports the following options:
+	- 'auto' use 'scatter' for up to 100,000 points, and 'density' above
+	- 'scatter' draw each point
+	- 'density' draw a raster of the number of points falling in each bin of a 2-D histogram, the lines, CIs and range frame are still calculated from every point
 
 	:param data1: List of values from the first method
 	:type data1: list like
@@ -46,40 +69,25 @@ def blandAltman(data1, data2, limitOfAgreement=1.96, confidenceInterval=95, conf
 	:param str meanColour: Colour to use for plotting the mean difference
 	:param str loaColour: Colour to use for plotting the limits of agreement
 	:param str pointColour: Colour for plotting data points
+	:param str pointRendering: How to draw the data points
+	:param subjects: If not ``None``, the subject each pair of values was measured in
+	:type subjects: None or list like
+	:param str limitOfAgreementMethod: Method used to place the limits of agreement
+	:param str missingData: How to handle pairs where either value is NaN or masked
+	:param out: If not ``None``, a tuple of floating point arrays the same shape as the data, to write the means and differences of each pair into, see :py:func:`~pyCompare.blandAltmanStatistics`
+	:type out: None or (numpy.array, numpy.array)
 
 	.. [#] Altman, D. G., and Bland, J. M. “Measurement in Medicine: The Analysis of Method Comparison Studies” Journal of the Royal Statistical Society. Series D (The Statistician), vol. 32, no. 3, 1983, pp. 307–317. `JSTOR <https://www.jstor.org/stable/2987937>`_.
 	.. [#] Altman, D. G., and Bland, J. M. “Measuring agreement in method comparison studies” Statistical Methods in Medical Research, vol. 8, no. 2, 1999, pp. 135–160. `DOI <https://doi.org/10.1177/096228029900800204>`_.
 	.. [#] Carkeet, A. "Exact Parametric Confidence Intervals for Bland-Altman Limits of Agreement" Optometry and Vision Science, vol. 92, no 3, 2015, pp. e71–e80 `DOI <https://doi.org/10.1097/OPX.0000000000000513>`_.
+	.. [#] Bland, J. M., and Altman, D. G. “Agreement between methods of measurement with multiple observations per individual” Journal of Biopharmaceutical Statistics, vol. 17, no. 4, 2007, pp. 571–582. `DOI <https://doi.org/10.1080/10543400701329422>`_.
 	"""
-	if not limitOfAgreement > 0:
-		raise ValueError('"limitOfAgreement" must be a number greater than zero.') 
-
-	# Try to coerce variables to numpy arrays
-	data1 = numpy.asarray(data1)
-	data2 = numpy.asarray(data2)
-
-	data2, slope, slopeErr = detrendFun(detrend, data1, data2)
-
-	mean = numpy.mean([data1, data2], axis=0)
-
-	if percentage:
-		diff = ((data1 - data2) / mean) * 100
-	else:
-		diff = data1 - data2
-
-	md = numpy.mean(diff)
-	sd = numpy.std(diff, axis=0)
+	mean, diff, result = _blandAltmanStatistics(data1, data2, limitOfAgreement, confidenceInterval, confidenceIntervalMethod, percentage, detrend, subjects, limitOfAgreementMethod, missingData, out)
 
-	if confidenceInterval:
-		confidenceIntervals = calculateConfidenceIntervals(md, sd, len(diff), limitOfAgreement, confidenceInterval, confidenceIntervalMethod)
-
-	else:
-		confidenceIntervals = dict()
-
-	ax = _drawBlandAltman(mean, diff, md, sd, percentage,
+	ax = _drawBlandAltman(mean, diff, result.md, result.sd, percentage,
 						  limitOfAgreement,
-						  confidenceIntervals,
-						  (detrend, slope, slopeErr),
+						  result.confidenceIntervals,
+						  (detrend, result.slope, result.slopeErr),
 						  title,
 						  ax,
 						  figureSize,
@@ -88,16 +96,39 @@ def blandAltman(data1, data2, limitOfAgreement=1.96, confidenceInterval=95, conf
 						  figureFormat,
 						  meanColour,
 						  loaColour,
-						  pointColour)
+						  pointColour,
+						  pointRendering,
+						  _limitLines(result),
+						  result.regression)
 
 	if ax is not None:
 		return ax
 
 
-def _drawBlandAltman(mean, diff, md, sd, percentage, limitOfAgreement, confidenceIntervals, detrend, title, ax, figureSize, dpi, savePath, figureFormat, meanColour, loaColour, pointColour):
+@timed('draw')
+def _drawBlandAltman(mean, diff, md, sd, percentage, limitOfAgreement, confidenceIntervals, detrend, title, ax, figureSize, dpi, savePath, figureFormat, meanColour, loaColour, pointColour, pointRendering='auto', limits=None, regression=None):
 	"""
 	Sub function to draw the plot.
+
+	If *limits* is not ``None``, limits of agreement are drawn from a tuple of (lowerLoA, upperLoA, lowerLabel, upperLabel), rather than *limitOfAgreement* SD from the mean.
+
+	If *regression* is not ``None``, the mean difference and limits of agreement are drawn as lines over the range of the means, from a dict of their (intercept, slope) as returned by :py:func:`~pyCompare._regressionLimits.regressionLimits`.
 	"""
+	import matplotlib.pyplot as plt
+	import matplotlib.transforms as transforms
+
+	from ._rangeFrameAxis import setRangeFrame
+
+	if pointRendering.lower() == 'auto':
+		pointRendering = 'density' if len(mean) > DENSITY_THRESHOLD else 'scatter'
+
+	if pointRendering.lower() not in ('scatter', 'density'):
+		raise NotImplementedError(f"'{pointRendering}' is not a valid method of rendering points.")
+
+	# Extent of the data, used to draw the range frame, ignoring any pairs with missing values
+	meanRange = (numpy.nanmin(mean), numpy.nanmax(mean))
+	diffRange = (numpy.nanmin(diff), numpy.nanmax(diff))
+
 	if ax is None:
 		fig, ax = plt.subplots(figsize=figureSize, dpi=dpi)
 		draw = True
@@ -125,33 +156,60 @@ def _drawBlandAltman(mean, diff, md, sd, percentage, limitOfAgreement, confidenc
 	##
 	# Plot the mean diff and LoA
 	##
-	ax.axhline(md, color=meanColour, linestyle='--')
-	ax.axhline(md + limitOfAgreement*sd, color=loaColour, linestyle='--')
-	ax.axhline(md - limitOfAgreement*sd, color=loaColour, linestyle='--')
+	if limits is None:
+		lowerLoA = md - limitOfAgreement*sd
+		upperLoA = md + limitOfAgreement*sd
+		lowerLabel = f'-{limitOfAgreement:.2f} SD'
+		upperLabel = f'+{limitOfAgreement:.2f} SD'
+	else:
+		lowerLoA, upperLoA, lowerLabel, upperLabel = limits
+
+	if regression is None:
+		ax.axhline(md, color=meanColour, linestyle='--')
+		ax.axhline(upperLoA, color=loaColour, linestyle='--')
+		ax.axhline(lowerLoA, color=loaColour, linestyle='--')
+
+		mdText, upperText, lowerText = f'{md:.2f}', f'{upperLoA:.2f}', f'{lowerLoA:.2f}'
+
+	else:
+		meanLimits = numpy.array(meanRange)
+
+		for key, colour in [('mean', meanColour), ('upperLoA', loaColour), ('lowerLoA', loaColour)]:
+			intercept, slope = regression[key]
+			ax.plot(meanLimits, intercept + slope * meanLimits, color=colour, linestyle='--')
+
+		# Label each line where it ends, with its equation
+		md, upperLoA, lowerLoA = [regression[key][0] + regression[key][1] * meanRange[1] for key in ['mean', 'upperLoA', 'lowerLoA']]
+		mdText, upperText, lowerText = [f'{regression[key][0]:.2f} {"-" if regression[key][1] < 0 else "+"} {abs(regression[key][1]):.3g}x' for key in ['mean', 'upperLoA', 'lowerLoA']]
 
 	##
 	# Plot the data points
 	##
-	ax.scatter(mean, diff, alpha=0.5, c=pointColour)
+	with span('draw.points'):
+		if pointRendering.lower() == 'scatter':
+			ax.scatter(mean, diff, alpha=0.5, c=pointColour)
+			count('pointsDrawn', numpy.size(mean))
+		else:
+			_drawDensity(ax, mean, diff, pointColour)
 
 	trans = transforms.blended_transform_factory(
 		ax.transAxes, ax.transData)
 
-	limitOfAgreementRange = (md + (limitOfAgreement * sd)) - (md - limitOfAgreement*sd)
+	limitOfAgreementRange = upperLoA - lowerLoA
 	offset = (limitOfAgreementRange / 100.0) * 1.5
 
 	ax.text(0.98, md + offset, 'Mean', ha="right", va="bottom", transform=trans)
-	ax.text(0.98, md - offset, f'{md:.2f}', ha="right", va="top", transform=trans)
+	ax.text(0.98, md - offset, mdText, ha="right", va="top", transform=trans)
 
-	ax.text(0.98, md + (limitOfAgreement * sd) + offset, f'+{limitOfAgreement:.2f} SD', ha="right", va="bottom", transform=trans)
-	ax.text(0.98, md + (limitOfAgreement * sd) - offset, f'{md + limitOfAgreement*sd:.2f}', ha="right", va="top", transform=trans)
+	ax.text(0.98, upperLoA + offset, upperLabel, ha="right", va="bottom", transform=trans)
+	ax.text(0.98, upperLoA - offset, upperText, ha="right", va="top", transform=trans)
 
-	ax.text(0.98, md - (limitOfAgreement * sd) - offset, f'-{limitOfAgreement:.2f} SD', ha="right", va="top", transform=trans)
-	ax.text(0.98, md - (limitOfAgreement * sd) + offset, f'{md - limitOfAgreement*sd:.2f}', ha="right", va="bottom", transform=trans)
+	ax.text(0.98, lowerLoA - offset, lowerLabel, ha="right", va="top", transform=trans)
+	ax.text(0.98, lowerLoA + offset, lowerText, ha="right", va="bottom", transform=trans)
 
 	# Only draw spine between extent of the data
-	ax.spines['left'].set_bounds(min(diff), max(diff))
-	ax.spines['bottom'].set_bounds(min(mean), max(mean))
+	ax.spines['left'].set_bounds(*diffRange)
+	ax.spines['bottom'].set_bounds(*meanRange)
 
 	# Hide the right and top spines
 	ax.spines['right'].set_visible(False)
@@ -163,23 +221,9 @@ def _drawBlandAltman(mean, diff, md, sd, percentage, limitOfAgreement, confidenc
 		ax.set_ylabel('Difference between methods')
 	ax.set_xlabel('Mean of methods')
 
-	tickLocs = ax.xaxis.get_ticklocs()
-	cadenceX = tickLocs[2] - tickLocs[1]
-	tickLocs = rangeFrameLocator(tickLocs, (min(mean), max(mean)))
-	ax.xaxis.set_major_locator(ticker.FixedLocator(tickLocs))
-
-	tickLocs = ax.yaxis.get_ticklocs()
-	cadenceY = tickLocs[2] - tickLocs[1]
-	tickLocs = rangeFrameLocator(tickLocs, (min(diff), max(diff)))
-	ax.yaxis.set_major_locator(ticker.FixedLocator(tickLocs))
-
-	ax.figure.canvas.draw() # Force drawing to populate tick labels
-
-	labels = rangeFrameLabler(ax.xaxis.get_ticklocs(), [item.get_text() for item in ax.get_xticklabels()], cadenceX)
-	ax.set_xticklabels(labels)
-
-	labels = rangeFrameLabler(ax.yaxis.get_ticklocs(), [item.get_text() for item in ax.get_yticklabels()], cadenceY)
-	ax.set_yticklabels(labels)
+	# Ticks and labels are placed when the figure is drawn
+	setRangeFrame(ax.xaxis, meanRange)
+	setRangeFrame(ax.yaxis, diffRange)
 
 
 	ax.patch.set_alpha(0)
@@ -187,7 +231,7 @@ def _drawBlandAltman(mean, diff, md, sd, percentage, limitOfAgreement, confidenc
 	if detrend[0] is None:
 		pass
 	else:
-		plt.text(1, -0.1, f'{detrend[0]} slope correction factor: {detrend[1]:.2f} ± {detrend[2]:.2f}', ha='right', transform=ax.transAxes)
+		ax.text(1, -0.1, f'{detrend[0]} slope correction factor: {detrend[1]:.2f} ± {detrend[2]:.2f}', ha='right', transform=ax.transAxes)
 
 	if title:
 		ax.set_title(title)
@@ -196,9 +240,59 @@ def _drawBlandAltman(mean, diff, md, sd, percentage, limitOfAgreement, confidenc
 	# Save or draw
 	##
 	if (savePath is not None) & draw:
-		fig.savefig(savePath, format=figureFormat, dpi=dpi)
+		with span('save'):
+			fig.savefig(savePath, format=figureFormat, dpi=dpi)
 		plt.close()
 	elif draw:
 		plt.show()
 	else:
 		return ax
+
+
+def _limitLines(result):
+	"""
+	Limits of agreement and their labels to pass to :py:func:`_drawBlandAltman`, ``None`` if placed at multiples of the SD.
+	"""
+	if result.limitOfAgreementMethod.lower() in ('parametric', 'regression'):
+		return None
+
+	lowerQuantile, upperQuantile = nonParametricQuantiles(result.limitOfAgreement)
+
+	return (result.lowerLoA, result.upperLoA, f'{100 * lowerQuantile:.1f}th centile', f'{100 * upperQuantile:.1f}th centile')
+
+
+def _drawDensity(ax, mean, diff, pointColour, bins=DENSITY_BINS):
+	"""
+	Draw the points as a single raster of the counts in each bin of a 2-D histogram, shaded from translucent to opaque *pointColour* on a log scale.
+	"""
+	import matplotlib.colors as colors
+
+	# Bin only the pairs that can be placed, as a scatter plot skips points with missing values
+	finite = numpy.isfinite(mean) & numpy.isfinite(diff)
+
+	if finite.all():
+		counts, xedges, yedges = numpy.histogram2d(mean, diff, bins=bins)
+	else:
+		counts, xedges, yedges = numpy.histogram2d(mean[finite], diff[finite], bins=bins)
+	counts = numpy.ma.masked_equal(counts.T, 0)
+
+	count('pointsDrawn', numpy.size(mean))
+	count('densityBins', int(counts.count()))
+
+	colour = colors.to_rgb(pointColour)
+	cmap = colors.LinearSegmentedColormap.from_list('density', [colour + (0.2,), colour + (1.,)])
+
+	image = ax.imshow(counts,
+					  origin='lower',
+					  extent=(xedges[0], xedges[-1], yedges[0], yedges[-1]),
+					  aspect='auto',
+					  interpolation='nearest',
+					  cmap=cmap,
+					  norm=colors.LogNorm(vmin=1, vmax=max(counts.max(), 1)))
+
+	# Leave a margin around the data, as with a scatter plot
+	image.sticky_edges.x[:] = []
+	image.sticky_edges.y[:] = []
+	ax.autoscale_view()
+
+	return image
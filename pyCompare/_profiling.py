@@ -0,0 +1,164 @@
+import threading
+import functools
+from time import perf_counter
+
+##
+# Profilers currently recording, checked before any timing is done so that instrumentation costs a single test when none are
+##
+_profilers = []
+_lock = threading.RLock()
+
+
+class _NullSpan:
+	"""
+	Shared no-op context, used in place of a span when no profiler is active.
+	"""
+	__slots__ = ()
+
+	def __enter__(self):
+
+		return self
+
+	def __exit__(self, *exc):
+
+		pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+	"""
+	Context manager recording the time spent in each stage of the statistics calculated and plots drawn within it, and counters of the work done in each.
+
+	Spans are named by stage, such as 'statistics', 'detrend', 'confidenceIntervals', 'draw' and 'save', and nest, so the time of a span includes that of any spans within it. Counters include the number of 'pairs' analysed, 'pointsDrawn', 'densityBins' filled, Carkeet coefficients 'carkeetCIest.cached' and 'carkeetCIest.solved', and 'bootstrap.resamples' drawn. Work done in other processes, such as Carkeet coefficients solved in a process pool, or plots drawn by :py:func:`~pyCompare.blandAltmanBatch` with *executor='process'*, is not recorded.
+
+	When no profiler is active, each instrumented stage costs a single test of an empty list.
+
+	:param callback: If not ``None``, also called as ``callback(kind, name, value)`` as each span ends, with *kind* 'span' and *value* its duration in seconds, and as each counter is incremented, with *kind* 'counter'
+	:type callback: None or callable
+	:ivar dict timings: Total seconds spent in each span
+	:ivar dict calls: Number of times each span was entered
+	:ivar dict counters: Total of each counter
+	"""
+	__slots__ = ('timings', 'calls', 'counters', 'callback')
+
+	def __init__(self, callback=None):
+
+		self.timings = dict()
+		self.calls = dict()
+		self.counters = dict()
+		self.callback = callback
+
+	def __enter__(self):
+
+		with _lock:
+			_profilers.append(self)
+
+		return self
+
+	def __exit__(self, *exc):
+
+		with _lock:
+			_profilers.remove(self)
+
+	def __repr__(self):
+
+		return f'Profiler(spans={len(self.timings)}, counters={len(self.counters)})'
+
+	def report(self):
+		"""
+		Summarise the spans, slowest first, and counters recorded.
+
+		:return: Table of the total time and number of calls of each span, followed by the total of each counter
+		:rtype: str
+		"""
+		lines = [f'{"span":<24}{"seconds":>12}{"calls":>10}']
+
+		for name in sorted(self.timings, key=self.timings.get, reverse=True):
+			lines.append(f'{name:<24}{self.timings[name]:>12.4f}{self.calls[name]:>10}')
+
+		if self.counters:
+			lines.append('')
+			lines.append(f'{"counter":<24}{"total":>12}')
+
+			for name in sorted(self.counters):
+				lines.append(f'{name:<24}{self.counters[name]:>12}')
+
+		return '\n'.join(lines)
+
+	def _record(self, kind, name, value):
+
+		if kind == 'span':
+			self.timings[name] = self.timings.get(name, 0) + value
+			self.calls[name] = self.calls.get(name, 0) + 1
+		else:
+			self.counters[name] = self.counters.get(name, 0) + value
+
+		if self.callback is not None:
+			self.callback(kind, name, value)
+
+
+class _Span:
+	"""
+	Time the block within it, and record the duration with every active profiler.
+	"""
+	__slots__ = ('name', 'start')
+
+	def __init__(self, name):
+
+		self.name = name
+
+	def __enter__(self):
+
+		self.start = perf_counter()
+
+		return self
+
+	def __exit__(self, *exc):
+
+		_emit('span', self.name, perf_counter() - self.start)
+
+
+def span(name):
+	"""
+	Context manager timing the stage *name* if any profiler is active, or a shared no-op context otherwise.
+	"""
+	if not _profilers:
+		return _NULL_SPAN
+
+	return _Span(name)
+
+
+def timed(name):
+	"""
+	Decorator timing every call of a function as the stage *name*, if any profiler is active.
+	"""
+	def decorator(function):
+
+		@functools.wraps(function)
+		def wrapper(*args, **kwargs):
+			if not _profilers:
+				return function(*args, **kwargs)
+
+			with _Span(name):
+				return function(*args, **kwargs)
+
+		return wrapper
+
+	return decorator
+
+
+def count(name, value=1):
+	"""
+	Add *value* to the counter *name*, if any profiler is active.
+	"""
+	if _profilers:
+		_emit('counter', name, value)
+
+
+def _emit(kind, name, value):
+
+	with _lock:
+		for profiler in _profilers:
+			profiler._record(kind, name, value)
@@ -0,0 +1,151 @@
+import numpy
+
+class QuantileSketch:
+	"""
+	Mergeable sketch of the distribution of a stream of values, from which quantiles may be estimated with a bounded relative error.
+
+	Values are counted in logarithmically spaced buckets, as in DDSketch [#]_, so that any quantile estimated is within *relativeAccuracy* of the value of that rank in the stream, in memory that grows only with the logarithm of the range of magnitudes seen. Values smaller in magnitude than :py:attr:`minMagnitude` are counted as zero.
+
+	Sketches of the same *relativeAccuracy* built from separate shards of the data may be combined with :py:meth:`merge`.
+
+	:param float relativeAccuracy: Largest relative error of quantile estimates
+	:ivar int n: Number of values sketched
+	:ivar float minValue: Smallest value sketched
+	:ivar float maxValue: Largest value sketched
+
+	.. [#] Masson, C., Rim, J. E., and Lee, H. K. "DDSketch: A Fast and Fully-Mergeable Quantile Sketch with Relative-Error Guarantees" Proceedings of the VLDB Endowment, vol. 12, no. 12, 2019, pp. 2195–2205. `DOI <https://doi.org/10.14778/3352063.3352135>`_.
+	"""
+	__slots__ = ('relativeAccuracy', 'n', 'minValue', 'maxValue', 'zeroCount', 'positiveKeys', 'positiveCounts', 'negativeKeys', 'negativeCounts', '_gamma', '_logGamma')
+
+	minMagnitude = 1e-100
+
+	def __init__(self, relativeAccuracy=0.001):
+
+		if not (relativeAccuracy > 0) & (relativeAccuracy < 1):
+			raise ValueError(f'"relativeAccuracy" must be a number between zero and one, "{relativeAccuracy}" provided.')
+
+		self.relativeAccuracy = relativeAccuracy
+		self.n = 0
+		self.minValue = numpy.inf
+		self.maxValue = -numpy.inf
+		self.zeroCount = 0
+		self.positiveKeys = numpy.empty(0, dtype=numpy.int64)
+		self.positiveCounts = numpy.empty(0, dtype=numpy.int64)
+		self.negativeKeys = numpy.empty(0, dtype=numpy.int64)
+		self.negativeCounts = numpy.empty(0, dtype=numpy.int64)
+
+		self._gamma = (1 + relativeAccuracy) / (1 - relativeAccuracy)
+		self._logGamma = numpy.log(self._gamma)
+
+	def __repr__(self):
+
+		return f'QuantileSketch(n={self.n}, relativeAccuracy={self.relativeAccuracy}, buckets={self.positiveKeys.size + self.negativeKeys.size})'
+
+	def update(self, values):
+		"""
+		Add a chunk of values.
+
+		:param values: Values to add
+		:type values: list like
+		:return: This sketch
+		:rtype: QuantileSketch
+		"""
+		values = numpy.asarray(values, dtype=float).ravel()
+
+		if values.size == 0:
+			return self
+
+		self.n += values.size
+		self.minValue = min(self.minValue, numpy.min(values))
+		self.maxValue = max(self.maxValue, numpy.max(values))
+
+		magnitudes = numpy.abs(values)
+		zeros = magnitudes < self.minMagnitude
+		self.zeroCount += int(numpy.count_nonzero(zeros))
+
+		keys = numpy.ceil(numpy.log(magnitudes[~zeros]) / self._logGamma).astype(numpy.int64)
+		negative = values[~zeros] < 0
+
+		self.positiveKeys, self.positiveCounts = _mergeBuckets(self.positiveKeys, self.positiveCounts, *numpy.unique(keys[~negative], return_counts=True))
+		self.negativeKeys, self.negativeCounts = _mergeBuckets(self.negativeKeys, self.negativeCounts, *numpy.unique(keys[negative], return_counts=True))
+
+		return self
+
+	def merge(self, other):
+		"""
+		Combine the counts of *other*, sketched from a different set of values, into this sketch.
+
+		:param QuantileSketch other: Sketch to merge
+		:return: This sketch
+		:rtype: QuantileSketch
+		"""
+		if other.relativeAccuracy != self.relativeAccuracy:
+			raise ValueError(f'Can not merge sketches of different accuracy, {self.relativeAccuracy} and {other.relativeAccuracy}.')
+
+		self.n += other.n
+		self.minValue = min(self.minValue, other.minValue)
+		self.maxValue = max(self.maxValue, other.maxValue)
+		self.zeroCount += other.zeroCount
+
+		self.positiveKeys, self.positiveCounts = _mergeBuckets(self.positiveKeys, self.positiveCounts, other.positiveKeys, other.positiveCounts)
+		self.negativeKeys, self.negativeCounts = _mergeBuckets(self.negativeKeys, self.negativeCounts, other.negativeKeys, other.negativeCounts)
+
+		return self
+
+	def quantile(self, q):
+		"""
+		Estimate the value of rank ``floor(q * (n - 1))`` in the sorted values sketched.
+
+		:param q: Quantile or quantiles to estimate, in the range 0 to 1
+		:type q: float or list like
+		:return: Estimated quantiles
+		:rtype: float or numpy.array
+		"""
+		if self.n == 0:
+			raise ValueError('Can not estimate quantiles of an empty sketch.')
+
+		q = numpy.asarray(q, dtype=float)
+
+		if numpy.any((q < 0) | (q > 1)):
+			raise ValueError(f'"q" must be in the range 0 to 1, "{q}" provided.')
+
+		# Bucket values and counts in ascending order, most negative first
+		values = numpy.concatenate((-self._bucketValue(self.negativeKeys[::-1]),
+									[0.],
+									self._bucketValue(self.positiveKeys)))
+		counts = numpy.concatenate((self.negativeCounts[::-1],
+									[self.zeroCount],
+									self.positiveCounts))
+
+		ranks = numpy.floor(q * (self.n - 1))
+		index = numpy.searchsorted(numpy.cumsum(counts), ranks, side='right')
+
+		estimates = numpy.clip(values[index], self.minValue, self.maxValue)
+
+		# The extremes are tracked exactly
+		estimates = numpy.where(q == 0, self.minValue, estimates)
+		estimates = numpy.where(q == 1, self.maxValue, estimates)
+
+		if estimates.ndim == 0:
+			return float(estimates)
+
+		return estimates
+
+	def _bucketValue(self, keys):
+		"""
+		Value representing each bucket, within *relativeAccuracy* of every value counted in it.
+		"""
+		return 2 * numpy.exp(keys * self._logGamma) / (self._gamma + 1)
+
+
+def _mergeBuckets(keysA, countsA, keysB, countsB):
+	"""
+	Sum the counts of two sets of buckets, returning the union of their keys in ascending order.
+	"""
+	if keysB.size == 0:
+		return keysA, countsA
+
+	keys, index = numpy.unique(numpy.concatenate((keysA, keysB)), return_inverse=True)
+	counts = numpy.bincount(index.ravel(), weights=numpy.concatenate((countsA, countsB))).astype(numpy.int64)
+
+	return keys, counts
@@ -0,0 +1,97 @@
+import matplotlib.ticker as ticker
+
+from ._rangeFrameLocator import rangeFrameLocator, rangeFrameLabler
+
+class RangeFrameLocator(ticker.Locator):
+	"""
+	Tick locator for a Tufte style range frame, placing ticks at the min and max of the data and at those of *base* that fall between them.
+
+	Ticks are calculated lazily from the view limits when the axis is drawn, by :py:func:`rangeFrameLocator`.
+
+	:param tuple axisRange: Tuple of (min, max) value on the axis
+	:param matplotlib.ticker.Locator base: Locator to place the inner ticks, defaults to :py:class:`matplotlib.ticker.AutoLocator`
+	"""
+	def __init__(self, axisRange, base=None):
+
+		self.axisRange = axisRange
+		self.base = ticker.AutoLocator() if base is None else base
+		self.cadence = None
+
+	def set_axis(self, axis):
+
+		super().set_axis(axis)
+		self.base.set_axis(axis)
+
+	def __call__(self):
+
+		vmin, vmax = self.axis.get_view_interval()
+
+		return self.tick_values(vmin, vmax)
+
+	def tick_values(self, vmin, vmax):
+
+		tickLocs = self.base.tick_values(vmin, vmax)
+
+		if len(tickLocs) > 2:
+			self.cadence = tickLocs[2] - tickLocs[1]
+		else:
+			self.cadence = 0
+
+		return rangeFrameLocator(tickLocs, self.axisRange)
+
+
+class RangeFrameFormatter(ticker.Formatter):
+	"""
+	Tick formatter for a Tufte style range frame, labelling ticks with *base* and blanking those too close to the marginal ticks, by :py:func:`rangeFrameLabler`.
+
+	:param RangeFrameLocator locator: Locator placing the ticks being labelled
+	:param matplotlib.ticker.Formatter base: Formatter to label the ticks, defaults to :py:class:`matplotlib.ticker.ScalarFormatter`
+	"""
+	def __init__(self, locator, base=None):
+
+		self.locator = locator
+		self.base = ticker.ScalarFormatter() if base is None else base
+		self._locs = []
+
+	def set_axis(self, axis):
+
+		super().set_axis(axis)
+		self.base.set_axis(axis)
+
+	def set_locs(self, locs):
+
+		self._locs = locs
+		self.base.set_locs(locs)
+
+	def __call__(self, x, pos=None):
+
+		label = self.base(x, pos)
+
+		# Before matplotlib 3.1, ticks are labelled one at a time after set_locs, rather than by format_ticks
+		if (pos is not None) and (pos < len(self._locs)):
+			return rangeFrameLabler(self._locs, [label] * len(self._locs), self.locator.cadence)[pos]
+
+		return label
+
+	def format_ticks(self, values):
+
+		labels = self.base.format_ticks(values)
+
+		return rangeFrameLabler(values, labels, self.locator.cadence)
+
+	def get_offset(self):
+
+		return self.base.get_offset()
+
+
+def setRangeFrame(axis, axisRange):
+	"""
+	Set the major ticks and labels of *axis* to a range frame over *axisRange*.
+
+	:param matplotlib.axis.Axis axis: Axis to set
+	:param tuple axisRange: Tuple of (min, max) value on the axis
+	"""
+	locator = RangeFrameLocator(axisRange)
+
+	axis.set_major_locator(locator)
+	axis.set_major_formatter(RangeFrameFormatter(locator))
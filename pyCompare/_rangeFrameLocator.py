@@ -2,7 +2,7 @@ def rangeFrameLocator(tickLocs, axisRange):
 	"""
 	Convert axis tick positions for a Tufte style range frame. Takes existing tick locations, places a tick at the min and max of the data, and drops existing ticks that fall outside of this range or too close to the margins.
 
-	TODO: Convert to a true axis artist that also sets spines
+	Applied lazily at draw time by :py:class:`~pyCompare._rangeFrameAxis.RangeFrameLocator`.
 
 	:param list tickLocs: List of current tick locations on the axis
 	:param tuple axisRange: Tuple of (min, max) value on the axis
@@ -27,6 +27,8 @@ def rangeFrameLocator(tickLocs, axisRange):
 def rangeFrameLabler(tickLocs, tickLabels, cadence):
 	"""
 	Takes lists of tick positions and labels and drops the marginal text label where the gap between ticks is less than half the cadence value
+
+	Applied lazily at draw time by :py:class:`~pyCompare._rangeFrameAxis.RangeFrameFormatter`.
 	
 	:param list tickLocs: List of current tick locations on the axis
 	:param list tickLabels: List of tick labels
@@ -0,0 +1,68 @@
+import numpy
+
+from ._profiling import timed
+
+@timed('regressionLimits')
+def regressionLimits(mean, diff, limitOfAgreement, where=None):
+	"""
+	Model the mean difference and limits of agreement as linear functions of the mean of each pair, for differences that vary, or spread out, with the size of the measurement, by the regression method described by Bland & Altman [#]_.
+
+	The differences are regressed on the means, and the absolute residuals of that fit are then regressed on the means. As the mean absolute deviation of a normal distribution is :math:`\\sqrt{2/\\pi}` times its standard deviation, the limits of agreement lie :math:`limitOfAgreement \\cdot \\sqrt{\\pi/2}` times the fitted absolute residual either side of the fitted difference.
+
+	Both fits are calculated in closed form along the last axis, so each row of 2-D inputs is fitted independently.
+
+	:param numpy.array mean: Means of each pair
+	:param numpy.array diff: Differences between methods
+	:param float limitOfAgreement: Multiples of the standard deviation to place the limits of agreement at
+	:param where: If not ``None``, a boolean array the same shape as *diff*, fitting only the pairs where it is ``True``
+	:type where: None or numpy.array
+	:return: Tuple of (intercept, slope) of the mean difference and each limit of agreement, keyed by 'mean', 'upperLoA' and 'lowerLoA'
+	:rtype: dict
+
+	.. [#] Altman, D. G., and Bland, J. M. “Measuring agreement in method comparison studies” Statistical Methods in Medical Research, vol. 8, no. 2, 1999, pp. 135–160. `DOI <https://doi.org/10.1177/096228029900800204>`_.
+	"""
+	biasIntercept, biasSlope = _leastSquares(mean, diff, where)
+
+	residuals = diff - (biasIntercept[..., numpy.newaxis] + biasSlope[..., numpy.newaxis] * mean)
+
+	spreadIntercept, spreadSlope = _leastSquares(mean, numpy.abs(residuals), where)
+
+	scale = limitOfAgreement * numpy.sqrt(numpy.pi / 2)
+
+	regression = dict()
+	regression['mean'] = (_scalar(biasIntercept), _scalar(biasSlope))
+	regression['upperLoA'] = (_scalar(biasIntercept + scale * spreadIntercept), _scalar(biasSlope + scale * spreadSlope))
+	regression['lowerLoA'] = (_scalar(biasIntercept - scale * spreadIntercept), _scalar(biasSlope - scale * spreadSlope))
+
+	return regression
+
+
+def _leastSquares(x, y, where=None):
+	"""
+	Intercept and slope of the least squares fit of *y* on *x*, along the last axis, over the points where *where* is ``True`` if given.
+	"""
+	if where is None:
+		where = True
+		n = x.shape[-1]
+	else:
+		n = numpy.count_nonzero(where, axis=-1)[..., numpy.newaxis]
+
+	xMean = numpy.sum(x, axis=-1, keepdims=True, where=where) / n
+	yMean = numpy.sum(y, axis=-1, keepdims=True, where=where) / n
+
+	xm = x - xMean
+
+	slope = numpy.sum(xm * (y - yMean), axis=-1, where=where) / numpy.sum(xm * xm, axis=-1, where=where)
+	intercept = yMean[..., 0] - slope * xMean[..., 0]
+
+	return intercept, slope
+
+
+def _scalar(value):
+	"""
+	Unwrap 0-d arrays, from fits of 1-D data, to floats.
+	"""
+	if numpy.ndim(value) == 0:
+		return float(value)
+
+	return value
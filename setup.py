@@ -19,7 +19,7 @@ setup(name='pyCompare',
 	url='https://github.com/jaketmp/pyCompare',
 	author='Jake TM Pearce',
 	license='MIT',
-	packages=find_packages(),
+	packages=find_packages(exclude=['benchmarks']),
 	install_requires=[
 		'numpy>=1.18.1',
 		'scipy>=1.0.1',
@@ -40,6 +40,9 @@ setup(name='pyCompare',
 	long_description_content_type='text/markdown',
 	long_description = README,
 	documentation='https://github.com/jaketmp/pyCompare',
+	entry_points={
+		'console_scripts': ['pycompare = pyCompare._cli:main'],
+	},
 	include_package_data=True,
 	zip_safe=True
 	)
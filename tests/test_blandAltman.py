@@ -3,6 +3,8 @@ import sys
 import unittest
 import tempfile
 import os
+import importlib.util
+from unittest import mock
 
 sys.path.append("..")
 import pyCompare
@@ -45,10 +47,47 @@ class test_plotting(unittest.TestCase):
 
 				self.assertTrue(os.path.exists(outputPath))
 
+			with self.subTest(msg='Density'):
+				outputPath = os.path.join(tmpdirname, 'plot_density')
+				pyCompare.blandAltman(numpy.random.rand(self.noSamp)*100+100,
+										  numpy.random.rand(self.noSamp)*50+100,
+										  pointRendering='density',
+										  savePath=outputPath)
+
+				self.assertTrue(os.path.exists(outputPath))
+
+			for pointRendering in ['auto', 'scatter', 'density']:
+				with self.subTest(msg=f'Missing values, {pointRendering}'):
+					outputPath = os.path.join(tmpdirname, f'plot_missing_{pointRendering}')
+
+					data1 = numpy.random.rand(self.noSamp)*100+100
+					data1[self.noSamp // 2] = numpy.nan
+
+					# Draw 'auto' as a density raster
+					with mock.patch('pyCompare._plotBlandAltman.DENSITY_THRESHOLD', 10):
+						pyCompare.blandAltman(data1,
+											  numpy.random.rand(self.noSamp)*50+100,
+											  pointRendering=pointRendering,
+											  savePath=outputPath)
+
+					self.assertTrue(os.path.exists(outputPath))
+
+			with self.subTest(msg='Missing values, density counts'):
+				import matplotlib.pyplot
+
+				data1 = numpy.random.rand(self.noSamp)*100+100
+				data1[::7] = numpy.nan
+
+				fig, ax = matplotlib.pyplot.subplots()
+				pyCompare.blandAltman(data1, data1 + numpy.random.rand(self.noSamp), pointRendering='density', confidenceInterval=None, ax=ax)
+
+				self.assertEqual(ax.images[0].get_array().sum(), numpy.count_nonzero(~numpy.isnan(data1)))
+				matplotlib.pyplot.close(fig)
+
 
 	def test_blandAtlman_axis_handle(self):
 
-		import matplotlib
+		import matplotlib.pyplot
 
 		with self.subTest(msg='Single axis'):
 
@@ -90,6 +129,817 @@ class test_plotting(unittest.TestCase):
 								  savePath=None)
 
 
+	def test_blandAltmanStatistics(self):
+
+		data1 = numpy.random.rand(self.noSamp)*100+100
+		data2 = numpy.random.rand(self.noSamp)*50+100
+
+		with self.subTest(msg='Default Parameters'):
+			result = pyCompare.blandAltmanStatistics(data1, data2)
+
+			self.assertIsInstance(result, pyCompare.BlandAltmanResult)
+			self.assertEqual(result.n, self.noSamp)
+			numpy.testing.assert_allclose(result.md, numpy.mean(data1 - data2))
+			numpy.testing.assert_allclose(result.sd, numpy.std(data1 - data2))
+			numpy.testing.assert_allclose(result.upperLoA, result.md + 1.96 * result.sd)
+			numpy.testing.assert_allclose(result.lowerLoA, result.md - 1.96 * result.sd)
+			self.assertEqual(set(result.confidenceIntervals.keys()), {'mean', 'upperLoA', 'lowerLoA'})
+			self.assertIsNone(result.slope)
+
+			with self.assertRaises(AttributeError):
+				result.notAStatistic = 1
+
+		with self.subTest(msg='Percentage, detrended, no CIs'):
+			result = pyCompare.blandAltmanStatistics(data1, data2, confidenceInterval=None, percentage=True, detrend='Linear')
+
+			self.assertEqual(result.confidenceIntervals, dict())
+			self.assertTrue(result.percentage)
+			self.assertIsNotNone(result.slope)
+			self.assertIsNotNone(result.slopeErr)
+
+		self.assertRaises(ValueError, pyCompare.blandAltmanStatistics, data1, data2, limitOfAgreement=-2)
+
+
+	def test_blandAltmanStatistics_repeatedMeasures(self):
+
+		from pyCompare._calculateConfidenceIntervals import calculateConfidenceIntervals
+
+		subjects = numpy.repeat(numpy.arange(30), numpy.random.randint(1, 6, 30))
+		numpy.random.shuffle(subjects)
+
+		truth = numpy.random.rand(30)[subjects] * 100 + 100
+		data1 = truth + numpy.random.randn(subjects.size) + numpy.random.randn(30)[subjects]
+		data2 = truth + numpy.random.randn(subjects.size)
+
+		diff = data1 - data2
+
+		# One-way analysis of variance of the differences by subject
+		groups = [diff[subjects == subject] for subject in numpy.unique(subjects)]
+		n = diff.size
+		m = len(groups)
+		msWithin = sum(numpy.sum((group - numpy.mean(group))**2) for group in groups) / (n - m)
+		msBetween = sum(len(group) * (numpy.mean(group) - numpy.mean(diff))**2 for group in groups) / (m - 1)
+		divisor = (n**2 - sum(len(group)**2 for group in groups)) / ((m - 1) * n)
+		expectedSD = numpy.sqrt(max((msBetween - msWithin) / divisor, 0) + msWithin)
+
+		obtained = pyCompare.blandAltmanStatistics(data1, data2, subjects=subjects)
+
+		with self.subTest(msg='Variance components'):
+			self.assertEqual(obtained.n, n)
+			self.assertEqual(obtained.nSubjects, m)
+			numpy.testing.assert_allclose(obtained.md, numpy.mean(diff))
+			numpy.testing.assert_allclose(obtained.sd, expectedSD)
+
+		with self.subTest(msg='Confidence intervals from subjects'):
+			expected = calculateConfidenceIntervals(obtained.md, obtained.sd, m, 1.96, 95, 'approximate')
+
+			for key in ['mean', 'upperLoA', 'lowerLoA']:
+				numpy.testing.assert_allclose(obtained.confidenceIntervals[key], expected[key])
+
+		with self.subTest(msg='Single measurement per subject'):
+			obtained = pyCompare.blandAltmanStatistics(data1, data2, subjects=numpy.arange(n))
+
+			numpy.testing.assert_allclose(obtained.sd, numpy.std(diff, ddof=1))
+
+		with self.subTest(msg='Plot'):
+			with tempfile.TemporaryDirectory() as tmpdirname:
+				outputPath = os.path.join(tmpdirname, 'plot')
+				pyCompare.blandAltman(data1, data2, subjects=subjects, savePath=outputPath)
+
+				self.assertTrue(os.path.exists(outputPath))
+
+		self.assertRaises(ValueError, pyCompare.blandAltmanStatistics, data1, data2, subjects=subjects[:-1])
+		self.assertRaises(NotImplementedError, pyCompare.blandAltmanStatistics, data1, data2, subjects=subjects, confidenceIntervalMethod='bootstrap')
+		self.assertRaises(ValueError, pyCompare.blandAltmanStatistics, data1, data2, subjects=numpy.zeros(n))
+		self.assertRaises(ValueError, pyCompare.blandAltmanStatistics, numpy.stack([data1, data1]), numpy.stack([data2, data2]), subjects=subjects)
+
+
+	def test_blandAltmanStatistics_nonParametric(self):
+
+		data1 = numpy.random.rand(self.noSamp)*100+100
+		data2 = data1 + numpy.random.standard_t(3, self.noSamp) * 5
+
+		diff = data1 - data2
+		quantiles = [0.0249979, 0.9750021]
+
+		obtained = pyCompare.blandAltmanStatistics(data1, data2, limitOfAgreementMethod='nonparametric')
+
+		with self.subTest(msg='Percentile limits'):
+			numpy.testing.assert_allclose([obtained.lowerLoA, obtained.upperLoA], numpy.quantile(diff, quantiles), rtol=1e-5)
+			numpy.testing.assert_allclose(obtained.md, numpy.mean(diff))
+			self.assertEqual(obtained.limitOfAgreementMethod, 'nonparametric')
+
+		with self.subTest(msg='Order statistic confidence intervals'):
+			ordered = numpy.sort(diff)
+
+			for key, limit in [('lowerLoA', obtained.lowerLoA), ('upperLoA', obtained.upperLoA)]:
+				lower, upper = obtained.confidenceIntervals[key]
+
+				self.assertIn(lower, ordered)
+				self.assertIn(upper, ordered)
+				self.assertLessEqual(lower, limit)
+				self.assertGreaterEqual(upper, limit)
+
+		with self.subTest(msg='Batch'):
+			batch = pyCompare.blandAltmanStatistics(numpy.stack([data1, data2]), numpy.stack([data2, data1]), limitOfAgreementMethod='nonparametric')
+
+			numpy.testing.assert_allclose(batch.lowerLoA, [obtained.lowerLoA, -obtained.upperLoA])
+			numpy.testing.assert_allclose(batch.confidenceIntervals['lowerLoA'][0][0], obtained.confidenceIntervals['lowerLoA'][0])
+
+		with self.subTest(msg='Accumulated'):
+			accumulator = pyCompare.BlandAltmanAccumulator(quantileAccuracy=0.001)
+
+			for chunk1, chunk2 in zip(numpy.array_split(data1, 7), numpy.array_split(data2, 7)):
+				accumulator.update(chunk1, chunk2)
+
+			accumulated = accumulator.statistics(limitOfAgreementMethod='nonparametric')
+
+			# Within the sketch accuracy of the order statistic below each interpolated percentile
+			ranks = numpy.floor(numpy.array(quantiles) * (diff.size - 1)).astype(int)
+			numpy.testing.assert_allclose([accumulated.lowerLoA, accumulated.upperLoA], numpy.sort(diff)[ranks], rtol=1.01e-3)
+
+			for key in ['lowerLoA', 'upperLoA']:
+				numpy.testing.assert_allclose(accumulated.confidenceIntervals[key], obtained.confidenceIntervals[key], rtol=1.01e-3)
+
+			self.assertRaises(ValueError, pyCompare.BlandAltmanAccumulator().update(data1, data2).statistics, limitOfAgreementMethod='nonparametric')
+			self.assertRaises(ValueError, accumulator.merge, pyCompare.BlandAltmanAccumulator())
+
+		with self.subTest(msg='Plot'):
+			with tempfile.TemporaryDirectory() as tmpdirname:
+				outputPath = os.path.join(tmpdirname, 'plot')
+				pyCompare.blandAltman(data1, data2, limitOfAgreementMethod='nonparametric', savePath=outputPath)
+
+				self.assertTrue(os.path.exists(outputPath))
+
+				outputPath = os.path.join(tmpdirname, 'file')
+				numpy.save(outputPath + '.npy', numpy.stack([data1, data2], axis=1))
+				pyCompare.blandAltmanFile(outputPath + '.npy', limitOfAgreementMethod='nonparametric', savePath=outputPath)
+
+				self.assertTrue(os.path.exists(outputPath))
+
+		self.assertRaises(NotImplementedError, pyCompare.blandAltmanStatistics, data1, data2, limitOfAgreementMethod='median')
+		self.assertRaises(NotImplementedError, pyCompare.blandAltmanStatistics, data1, data2, limitOfAgreementMethod='nonparametric', subjects=numpy.arange(self.noSamp) // 2)
+
+
+	def test_blandAltmanStatistics_regression(self):
+
+		data1 = numpy.random.rand(self.noSamp)*100+10
+		data2 = data1 * 1.05 + numpy.random.randn(self.noSamp) * data1 * 0.04
+
+		mean = (data1 + data2) / 2
+		diff = data1 - data2
+
+		obtained = pyCompare.blandAltmanStatistics(data1, data2, limitOfAgreementMethod='regression')
+
+		with self.subTest(msg='Coefficients'):
+			biasSlope, biasIntercept = numpy.polyfit(mean, diff, 1)
+			residuals = diff - (biasIntercept + biasSlope * mean)
+			spreadSlope, spreadIntercept = numpy.polyfit(mean, numpy.abs(residuals), 1)
+
+			scale = 1.96 * numpy.sqrt(numpy.pi / 2)
+
+			numpy.testing.assert_allclose(obtained.regression['mean'], (biasIntercept, biasSlope))
+			numpy.testing.assert_allclose(obtained.regression['upperLoA'], (biasIntercept + scale * spreadIntercept, biasSlope + scale * spreadSlope))
+			numpy.testing.assert_allclose(obtained.regression['lowerLoA'], (biasIntercept - scale * spreadIntercept, biasSlope - scale * spreadSlope))
+
+			centre = numpy.mean(mean)
+			numpy.testing.assert_allclose(obtained.upperLoA, obtained.regression['upperLoA'][0] + obtained.regression['upperLoA'][1] * centre)
+			numpy.testing.assert_allclose(obtained.md, obtained.regression['mean'][0] + obtained.regression['mean'][1] * centre)
+
+			self.assertEqual(obtained.confidenceIntervals, dict())
+
+		with self.subTest(msg='Batch'):
+			batch = pyCompare.blandAltmanStatistics(numpy.stack([data1, data2]), numpy.stack([data2, data1]), limitOfAgreementMethod='regression')
+
+			for key in ['mean', 'upperLoA', 'lowerLoA']:
+				numpy.testing.assert_allclose(batch.regression[key][0][0], obtained.regression[key][0])
+				numpy.testing.assert_allclose(batch.regression[key][1][0], obtained.regression[key][1])
+
+			numpy.testing.assert_allclose(batch.regression['upperLoA'][1][1], -obtained.regression['lowerLoA'][1])
+
+		with self.subTest(msg='Plot'):
+			with tempfile.TemporaryDirectory() as tmpdirname:
+				outputPath = os.path.join(tmpdirname, 'plot')
+				pyCompare.blandAltman(data1, data2, limitOfAgreementMethod='regression', savePath=outputPath)
+
+				self.assertTrue(os.path.exists(outputPath))
+
+		self.assertRaises(NotImplementedError, pyCompare.blandAltmanStatistics, data1, data2, limitOfAgreementMethod='regression', subjects=numpy.arange(self.noSamp) // 2)
+		self.assertRaises(NotImplementedError, pyCompare.BlandAltmanAccumulator().update(data1, data2).statistics, limitOfAgreementMethod='regression')
+
+
+	def test_blandAltmanStatistics_missingData(self):
+
+		data1 = numpy.random.rand(self.noSamp)*100+10
+		data2 = data1 + numpy.random.randn(self.noSamp) * 5
+
+		data1[::10] = numpy.nan
+		masked2 = numpy.ma.masked_array(data2, mask=numpy.arange(self.noSamp) % 7 == 0)
+
+		valid = ~numpy.isnan(data1) & (numpy.arange(self.noSamp) % 7 != 0)
+
+		with self.subTest(msg='Drop'):
+			self.addCleanup(pyCompare.setBootstrapOptions)
+			pyCompare.setBootstrapOptions(resamples=200, seed=42)
+
+			for kwargs in [dict(), dict(percentage=True), dict(detrend='Linear'), dict(limitOfAgreementMethod='nonparametric'), dict(limitOfAgreementMethod='regression'), dict(confidenceIntervalMethod='bootstrap')]:
+				obtained = pyCompare.blandAltmanStatistics(data1, masked2, missingData='drop', **kwargs)
+				expected = pyCompare.blandAltmanStatistics(data1[valid], data2[valid], **kwargs)
+
+				self.assertEqual(obtained.n, numpy.count_nonzero(valid))
+				self.assertEqual(obtained.nDropped, self.noSamp - numpy.count_nonzero(valid))
+				numpy.testing.assert_allclose([obtained.md, obtained.sd, obtained.lowerLoA, obtained.upperLoA], [expected.md, expected.sd, expected.lowerLoA, expected.upperLoA])
+
+				for key in expected.confidenceIntervals:
+					numpy.testing.assert_allclose(obtained.confidenceIntervals[key], expected.confidenceIntervals[key])
+
+				if expected.regression is not None:
+					numpy.testing.assert_allclose(obtained.regression['upperLoA'], expected.regression['upperLoA'])
+
+		with self.subTest(msg='Drop, in place'):
+			mean, diff, obtained = pyCompare._blandAltmanStatistics._blandAltmanStatistics(data1, masked2, 1.96, 95, 'approximate', False, None, missingData='drop')
+
+			# Dropped pairs are held as NaN, rather than copied out of the means and differences
+			self.assertEqual(diff.shape, (self.noSamp,))
+			numpy.testing.assert_array_equal(numpy.isnan(diff), ~valid)
+			numpy.testing.assert_array_equal(numpy.isnan(mean), ~valid)
+
+		with self.subTest(msg='Drop, subjects'):
+			subjects = numpy.arange(self.noSamp) // 3
+
+			obtained = pyCompare.blandAltmanStatistics(data1, masked2, missingData='drop', subjects=subjects)
+			expected = pyCompare.blandAltmanStatistics(data1[valid], data2[valid], subjects=subjects[valid])
+
+			self.assertEqual(obtained.nSubjects, expected.nSubjects)
+			numpy.testing.assert_allclose(obtained.sd, expected.sd)
+
+		with self.subTest(msg='Drop, batch'):
+			batch = pyCompare.blandAltmanStatistics(numpy.stack([data1, data2]), numpy.stack([data2, data1]), missingData='drop')
+
+			rowValid = ~numpy.isnan(data1)
+			first = pyCompare.blandAltmanStatistics(data1[rowValid], data2[rowValid])
+			second = pyCompare.blandAltmanStatistics(data2, data1, missingData='drop')
+
+			numpy.testing.assert_array_equal(batch.n, [first.n, first.n])
+			numpy.testing.assert_array_equal(batch.nDropped, [self.noSamp - first.n, self.noSamp - first.n])
+			numpy.testing.assert_allclose(batch.md, [first.md, -first.md])
+			numpy.testing.assert_allclose(batch.sd, [first.sd, first.sd])
+			numpy.testing.assert_allclose(batch.confidenceIntervals['lowerLoA'][0], [first.confidenceIntervals['lowerLoA'][0], -first.confidenceIntervals['upperLoA'][1]])
+			numpy.testing.assert_allclose(second.md, -first.md)
+
+			self.assertRaises(NotImplementedError, pyCompare.blandAltmanStatistics, numpy.stack([data1, data2]), numpy.stack([data2, data1]), missingData='drop', detrend='Linear')
+
+		with self.subTest(msg='Propagate'):
+			obtained = pyCompare.blandAltmanStatistics(data1, data2, confidenceInterval=None)
+
+			self.assertTrue(numpy.isnan(obtained.md))
+			self.assertEqual(obtained.nDropped, 0)
+
+		with self.subTest(msg='Plot'):
+			with tempfile.TemporaryDirectory() as tmpdirname:
+				outputPath = os.path.join(tmpdirname, 'plot')
+				pyCompare.blandAltman(data1, masked2, missingData='drop', savePath=outputPath)
+
+				self.assertTrue(os.path.exists(outputPath))
+
+		self.assertRaises(ValueError, pyCompare.blandAltmanStatistics, data1, data2, missingData='raise')
+		self.assertRaises(NotImplementedError, pyCompare.blandAltmanStatistics, data1, data2, missingData='Unknown')
+
+		complete = pyCompare.blandAltmanStatistics(data2, data2 * 1.1, missingData='raise')
+		self.assertEqual(complete.nDropped, 0)
+
+
+	def test_blandAltmanStatistics_out(self):
+
+		data1 = numpy.random.rand(self.noSamp)*100+10
+		data2 = data1 + numpy.random.randn(self.noSamp) * 5
+
+		for percentage in [False, True]:
+			expected = pyCompare.blandAltmanStatistics(data1, data2, percentage=percentage)
+
+			with self.subTest(msg=f'float32, percentage={percentage}'):
+				obtained = pyCompare.blandAltmanStatistics(data1.astype(numpy.float32), data2.astype(numpy.float32), percentage=percentage)
+
+				self.assertEqual(numpy.asarray(obtained.md).dtype, numpy.float64)
+				numpy.testing.assert_allclose([obtained.md, obtained.sd], [expected.md, expected.sd], rtol=1e-4)
+
+			with self.subTest(msg=f'Buffers, percentage={percentage}'):
+				out = (numpy.empty(self.noSamp, dtype=numpy.float32), numpy.empty(self.noSamp, dtype=numpy.float32))
+
+				obtained = pyCompare.blandAltmanStatistics(data1, data2, percentage=percentage, out=out)
+
+				mean = (data1 + data2) / 2
+				diff = ((data1 - data2) / mean) * 100 if percentage else data1 - data2
+
+				numpy.testing.assert_allclose(out[0], mean, rtol=1e-6)
+				numpy.testing.assert_allclose(out[1], diff, rtol=1e-5, atol=1e-5)
+				numpy.testing.assert_allclose(obtained.sd, expected.sd, rtol=1e-5)
+
+			with self.subTest(msg=f'Chunked, percentage={percentage}'):
+				batch1 = numpy.stack([data1, data2, data1])
+				batch2 = numpy.stack([data2, data1, data1 * 1.1])
+
+				with mock.patch('pyCompare._blandAltmanStatistics.CHUNK_SIZE', 7):
+					obtained = pyCompare.blandAltmanStatistics(batch1, batch2, percentage=percentage)
+
+				unchunked = pyCompare.blandAltmanStatistics(batch1, batch2, percentage=percentage)
+
+				numpy.testing.assert_allclose(obtained.sd, unchunked.sd)
+				numpy.testing.assert_allclose(obtained.sd[0], expected.sd)
+
+		integers = pyCompare.blandAltmanStatistics(numpy.arange(self.noSamp), numpy.arange(self.noSamp) + numpy.arange(self.noSamp) % 3)
+		numpy.testing.assert_allclose([integers.md, integers.sd], [-numpy.mean(numpy.arange(self.noSamp) % 3), numpy.std(numpy.arange(self.noSamp) % 3)])
+
+		self.assertRaises(ValueError, pyCompare.blandAltmanStatistics, data1, data2, out=(numpy.empty(self.noSamp), numpy.empty(self.noSamp + 1)))
+		self.assertRaises(ValueError, pyCompare.blandAltmanStatistics, data1, data2, out=(numpy.empty(self.noSamp), numpy.empty(self.noSamp, dtype=int)))
+
+
+	def test_blandAltmanStatistics_batch(self):
+
+		noPairs = numpy.random.randint(2, high=20, size=None)
+
+		data1 = numpy.random.rand(noPairs, self.noSamp)*100+100
+		data2 = numpy.random.rand(noPairs, self.noSamp)*50+100
+
+		for kwargs in [dict(), dict(percentage=True), dict(detrend='Linear'), dict(detrend='ODR'), dict(confidenceIntervalMethod='exact paired')]:
+			with self.subTest(msg=str(kwargs)):
+				obtained = pyCompare.blandAltmanStatistics(data1, data2, **kwargs)
+
+				self.assertEqual(obtained.n, self.noSamp)
+
+				for i in range(noPairs):
+					expected = pyCompare.blandAltmanStatistics(data1[i], data2[i], **kwargs)
+
+					numpy.testing.assert_allclose(expected.md, obtained.md[i])
+					numpy.testing.assert_allclose(expected.sd, obtained.sd[i])
+					numpy.testing.assert_allclose(expected.upperLoA, obtained.upperLoA[i])
+					numpy.testing.assert_allclose(expected.lowerLoA, obtained.lowerLoA[i])
+					if expected.slope is not None:
+						numpy.testing.assert_allclose(expected.slope, obtained.slope[i], rtol=1e-6)
+						numpy.testing.assert_allclose(expected.slopeErr, obtained.slopeErr[i], rtol=1e-6)
+
+					for key in expected.confidenceIntervals.keys():
+						numpy.testing.assert_allclose(expected.confidenceIntervals[key], numpy.asarray(obtained.confidenceIntervals[key])[:, i])
+
+		self.assertRaises(ValueError, pyCompare.blandAltmanStatistics, data1, data2[:, 1:])
+
+
+	def test_blandAltmanAccumulator(self):
+
+		data1 = numpy.random.rand(self.noSamp)*100+100
+		data2 = numpy.random.rand(self.noSamp)*50+100
+
+		for percentage in [False, True]:
+			with self.subTest(msg=f'Percentage: {percentage}'):
+				split = numpy.sort(numpy.random.randint(0, high=self.noSamp, size=6))
+
+				shards = [pyCompare.BlandAltmanAccumulator(percentage=percentage), pyCompare.BlandAltmanAccumulator(percentage=percentage)]
+				for i, (chunk1, chunk2) in enumerate(zip(numpy.split(data1, split), numpy.split(data2, split))):
+					shards[i % 2].update(chunk1, chunk2)
+
+				accumulator = shards[0].merge(shards[1])
+
+				expected = pyCompare.blandAltmanStatistics(data1, data2, percentage=percentage)
+				obtained = accumulator.statistics()
+
+				self.assertEqual(obtained.n, expected.n)
+				numpy.testing.assert_allclose(obtained.md, expected.md)
+				numpy.testing.assert_allclose(obtained.sd, expected.sd)
+				for key in expected.confidenceIntervals.keys():
+					numpy.testing.assert_allclose(obtained.confidenceIntervals[key], expected.confidenceIntervals[key])
+
+				mean = numpy.mean([data1, data2], axis=0)
+				numpy.testing.assert_allclose(accumulator.meanMean, numpy.mean(mean))
+				numpy.testing.assert_allclose(accumulator.sdMean, numpy.std(mean))
+				self.assertEqual(accumulator.minMean, numpy.min(mean))
+				self.assertEqual(accumulator.maxMean, numpy.max(mean))
+
+		self.assertRaises(ValueError, pyCompare.BlandAltmanAccumulator().merge, pyCompare.BlandAltmanAccumulator(percentage=True))
+		self.assertRaises(ValueError, pyCompare.BlandAltmanAccumulator().update, data1, data2[1:])
+		self.assertRaises(ValueError, pyCompare.BlandAltmanAccumulator().statistics)
+
+
+	def test_blandAltmanFile(self):
+
+		import pandas
+
+		data1 = numpy.random.rand(self.noSamp)*100+100
+		data2 = numpy.random.rand(self.noSamp)*50+100
+
+		expected = pyCompare.blandAltmanStatistics(data1, data2)
+
+		with tempfile.TemporaryDirectory() as tmpdirname:
+			npyPath = os.path.join(tmpdirname, 'data.npy')
+			numpy.save(npyPath, numpy.stack([data1, data2], axis=1))
+
+			npyPaths = (os.path.join(tmpdirname, 'data1.npy'), os.path.join(tmpdirname, 'data2.npy'))
+			numpy.save(npyPaths[0], data1)
+			numpy.save(npyPaths[1], data2)
+
+			csvPath = os.path.join(tmpdirname, 'data.csv')
+			pandas.DataFrame({'id': numpy.arange(self.noSamp), 'methodA': data1, 'methodB': data2}).to_csv(csvPath, index=False)
+
+			for source, columns in [(npyPath, None), (npyPaths, None), (csvPath, ('methodA', 'methodB'))]:
+				with self.subTest(msg=str(source)):
+					obtained = pyCompare.accumulateFile(source, columns=columns, chunkSize=37).statistics()
+
+					self.assertEqual(obtained.n, expected.n)
+					numpy.testing.assert_allclose(obtained.md, expected.md)
+					numpy.testing.assert_allclose(obtained.sd, expected.sd)
+
+			with self.subTest(msg='Plot sample'):
+				from pyCompare._blandAltmanFile import _scanFile
+
+				accumulator, mean, diff = _scanFile(npyPath, None, False, 37, 50, 0)
+
+				self.assertLessEqual(len(mean), 54)
+				self.assertEqual(numpy.min(diff), accumulator.minDiff)
+				self.assertEqual(numpy.max(diff), accumulator.maxDiff)
+				self.assertEqual(numpy.min(mean), accumulator.minMean)
+				self.assertEqual(numpy.max(mean), accumulator.maxMean)
+
+			with self.subTest(msg='Save plot'):
+				outputPath = os.path.join(tmpdirname, 'plot')
+				pyCompare.blandAltmanFile(csvPath, columns=('methodA', 'methodB'), chunkSize=50, plotPoints=100, savePath=outputPath)
+
+				self.assertTrue(os.path.exists(outputPath))
+
+			with self.subTest(msg='Missing values'):
+				from pyCompare._blandAltmanFile import _scanFile
+
+				missing2 = data2.copy()
+				missing2[[5, 40, 41]] = numpy.nan
+
+				missingPath = os.path.join(tmpdirname, 'missing.csv')
+				pandas.DataFrame({'methodA': data1, 'methodB': missing2}).to_csv(missingPath, index=False)
+
+				expected = pyCompare.blandAltmanStatistics(data1, missing2, missingData='drop')
+
+				accumulator, mean, diff = _scanFile(missingPath, ('methodA', 'methodB'), False, 37, 50, 0, missingData='drop')
+				obtained = accumulator.statistics()
+
+				self.assertEqual(obtained.n, expected.n)
+				self.assertEqual(obtained.nDropped, 3)
+				numpy.testing.assert_allclose([obtained.md, obtained.sd], [expected.md, expected.sd])
+				self.assertTrue(numpy.isfinite([accumulator.minDiff, accumulator.maxDiff, accumulator.minMean, accumulator.maxMean]).all())
+				self.assertFalse(numpy.isnan(diff).any())
+
+				obtained = pyCompare.accumulateFile(missingPath, columns=('methodA', 'methodB'), chunkSize=37, missingData='drop').statistics()
+
+				self.assertEqual(obtained.nDropped, 3)
+				numpy.testing.assert_allclose([obtained.md, obtained.sd], [expected.md, expected.sd])
+
+				# Propagated missing values leave the statistics NaN, but not the extremes drawn
+				accumulator, mean, diff = _scanFile(missingPath, ('methodA', 'methodB'), False, 37, 50, 0)
+
+				self.assertTrue(numpy.isnan(accumulator.meanDiff))
+				self.assertTrue(numpy.isfinite(numpy.nanmax(diff)))
+				numpy.testing.assert_allclose(numpy.nanmax(diff), numpy.max(data1 - data2, where=~numpy.isnan(missing2), initial=-numpy.inf))
+
+				self.assertRaises(ValueError, pyCompare.accumulateFile, missingPath, columns=('methodA', 'methodB'), missingData='raise')
+
+				outputPath = os.path.join(tmpdirname, 'missingPlot')
+				pyCompare.blandAltmanFile(missingPath, columns=('methodA', 'methodB'), chunkSize=37, missingData='drop', savePath=outputPath)
+
+				self.assertTrue(os.path.exists(outputPath))
+
+			self.assertRaises(ValueError, pyCompare.accumulateFile, csvPath)
+			self.assertRaises(NotImplementedError, pyCompare.accumulateFile, os.path.join(tmpdirname, 'data.xlsx'))
+
+
+	@unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+	def test_blandAltmanFile_parquet(self):
+
+		import pandas
+
+		data1 = numpy.random.rand(self.noSamp)*100+100
+		data2 = numpy.random.rand(self.noSamp)*50+100
+
+		expected = pyCompare.blandAltmanStatistics(data1, data2)
+
+		with tempfile.TemporaryDirectory() as tmpdirname:
+			parquetPath = os.path.join(tmpdirname, 'data.parquet')
+			pandas.DataFrame({'methodB': data2, 'methodA': data1}).to_parquet(parquetPath)
+
+			obtained = pyCompare.accumulateFile(parquetPath, columns=('methodA', 'methodB'), chunkSize=37).statistics()
+
+			numpy.testing.assert_allclose(obtained.md, expected.md)
+			numpy.testing.assert_allclose(obtained.sd, expected.sd)
+
+			with self.subTest(msg='Nulls'):
+				# Nulls are read as NaN, as from a .csv file
+				data2[::10] = numpy.nan
+
+				parquetPath = os.path.join(tmpdirname, 'nulls.parquet')
+				pandas.DataFrame({'methodA': data1, 'methodB': data2}).to_parquet(parquetPath)
+
+				csvPath = os.path.join(tmpdirname, 'nulls.csv')
+				pandas.DataFrame({'methodA': data1, 'methodB': data2}).to_csv(csvPath, index=False)
+
+				obtained = pyCompare.accumulateFile(parquetPath, columns=('methodA', 'methodB'), chunkSize=37).statistics()
+				expected = pyCompare.accumulateFile(csvPath, columns=('methodA', 'methodB'), chunkSize=37).statistics()
+
+				self.assertEqual(obtained.n, self.noSamp)
+				self.assertTrue(numpy.isnan(obtained.md))
+				numpy.testing.assert_array_equal([obtained.n, obtained.md, obtained.sd], [expected.n, expected.md, expected.sd])
+
+
+	def test_profiler(self):
+
+		data1 = numpy.random.rand(self.noSamp)*100+10
+		data2 = data1 * 1.05 + numpy.random.randn(self.noSamp) * 5
+
+		events = list()
+
+		with tempfile.TemporaryDirectory() as tmpdirname:
+			outputPath = os.path.join(tmpdirname, 'plot')
+
+			with pyCompare.Profiler(callback=lambda *event: events.append(event)) as profiler:
+				pyCompare.blandAltman(data1, data2, detrend='Linear', confidenceIntervalMethod='exact paired', savePath=outputPath)
+
+			# Nothing is recorded outside the context
+			pyCompare.blandAltman(data1, data2, savePath=outputPath)
+
+		with self.subTest(msg='Spans'):
+			for name in ['blandAltman', 'statistics', 'detrend', 'meanDifference', 'confidenceIntervals', 'draw', 'draw.points', 'save']:
+				self.assertEqual(profiler.calls[name], 1, msg=name)
+				self.assertGreaterEqual(profiler.timings[name], 0)
+
+			self.assertGreaterEqual(profiler.timings['blandAltman'], profiler.timings['draw'])
+			self.assertGreaterEqual(profiler.timings['draw'], profiler.timings['save'])
+
+		with self.subTest(msg='Counters'):
+			self.assertEqual(profiler.counters['pairs'], self.noSamp)
+			self.assertEqual(profiler.counters['pointsDrawn'], self.noSamp)
+			self.assertEqual(profiler.counters['carkeetCIest.cached'] + profiler.counters['carkeetCIest.solved'], 2)
+
+		with self.subTest(msg='Callback'):
+			spans = [event for event in events if event[0] == 'span']
+			counters = [event for event in events if event[0] == 'counter']
+
+			self.assertEqual(len(spans), sum(profiler.calls.values()))
+			self.assertAlmostEqual(sum(event[2] for event in counters if event[1] == 'pairs'), self.noSamp)
+
+		with self.subTest(msg='Report'):
+			report = profiler.report()
+
+			self.assertIn('confidenceIntervals', report)
+			self.assertIn('pointsDrawn', report)
+
+		with self.subTest(msg='Nested profilers'):
+			with pyCompare.Profiler() as outer:
+				with pyCompare.Profiler() as inner:
+					pyCompare.blandAltmanStatistics(data1, data2)
+
+				pyCompare.blandAltmanStatistics(data1, data2)
+
+			self.assertEqual(inner.calls['statistics'], 1)
+			self.assertEqual(outer.calls['statistics'], 2)
+
+
+	def test_blandAltmanBatch(self):
+
+		data1 = numpy.random.rand(self.noSamp)*100+100
+		data2 = numpy.random.rand(self.noSamp)*50+100
+
+		with tempfile.TemporaryDirectory() as tmpdirname:
+			jobs = [{'data1': data1, 'data2': data2, 'savePath': os.path.join(tmpdirname, 'first.png')},
+					{'data1': data2, 'data2': data1, 'savePath': os.path.join(tmpdirname, 'second.png'), 'detrend': 'Linear', 'title': 'Second'},
+					{'data1': data1, 'data2': data2[:-1], 'savePath': os.path.join(tmpdirname, 'mismatched.png')},
+					{'data1': data1, 'data2': data2, 'savePath': os.path.join(tmpdirname, 'repeat.png')}]
+
+			for executor in [None, 'process']:
+				with self.subTest(msg=str(executor)):
+					results = pyCompare.blandAltmanBatch(jobs, executor=executor, maxWorkers=1)
+
+					self.assertEqual([result['savePath'] for result in results], [job['savePath'] for job in jobs])
+
+					self.assertIsNone(results[0]['error'])
+					self.assertIsNone(results[1]['error'])
+					self.assertTrue(results[2]['error'].startswith('ValueError'))
+					self.assertFalse(os.path.exists(jobs[2]['savePath']))
+
+					self.assertTrue(all(result['time'] > 0 for result in results))
+
+					# Reused figures are cleared between jobs
+					with open(jobs[0]['savePath'], 'rb') as first, open(jobs[3]['savePath'], 'rb') as repeat:
+						self.assertEqual(first.read(), repeat.read())
+
+					for job in jobs:
+						if os.path.exists(job['savePath']):
+							os.remove(job['savePath'])
+
+		self.assertRaises(NotImplementedError, pyCompare.blandAltmanBatch, jobs, executor='carrier pigeon')
+
+
+	def test_blandAltmanReport(self):
+
+		def pages(count):
+			for i in range(count):
+				data1 = numpy.random.rand(self.noSamp)*100+100
+				data2 = numpy.random.rand(self.noSamp)*50+100
+
+				yield {'data1': data1, 'data2': data2, 'title': f'Page {i}', 'detrend': 'Linear' if i % 2 else None}
+
+		with tempfile.TemporaryDirectory() as tmpdirname:
+			outputPath = os.path.join(tmpdirname, 'report.pdf')
+
+			obtained = pyCompare.blandAltmanReport(outputPath, pages(3), metadata={'Title': 'Agreement'})
+
+			self.assertEqual(obtained, 3)
+
+			with open(outputPath, 'rb') as file:
+				content = file.read()
+
+			self.assertTrue(content.startswith(b'%PDF'))
+			self.assertIn(b'/Count 3', content)
+
+			self.assertRaises(TypeError, pyCompare.blandAltmanReport, outputPath, [{'data1': [1, 2], 'data2': [1, 2], 'savePath': outputPath}])
+
+
+	def test_blandAltmanGrid(self):
+
+		from pyCompare._blandAltmanGrid import _groupedStatistics
+
+		data1 = numpy.random.rand(self.noSamp)*100+100
+		data2 = numpy.random.rand(self.noSamp)*50+100
+		groups = numpy.random.choice(['site A', 'site B', 'site C', 'site D', 'site E'], self.noSamp)
+
+		self.addCleanup(pyCompare.setBootstrapOptions)
+		pyCompare.setBootstrapOptions(resamples=200, seed=42)
+
+		for percentage, detrend, method in [(False, None, 'approximate'), (True, None, 'approximate'), (False, 'Linear', 'approximate'), (False, None, 'exact paired'), (False, None, 'bootstrap')]:
+			with self.subTest(msg=f'Statistics percentage={percentage} detrend={detrend} method={method}'):
+				labels, starts, counts, mean, diff, results = _groupedStatistics(data1, data2, groups, 1.96, 95, method, percentage, detrend)
+
+				self.assertEqual(list(labels), sorted(set(groups)))
+
+				for label, result in zip(labels, results):
+					expected = pyCompare.blandAltmanStatistics(data1[groups == label], data2[groups == label], percentage=percentage, detrend=detrend, confidenceIntervalMethod=method)
+
+					self.assertEqual(result.n, expected.n)
+					numpy.testing.assert_allclose(result.md, expected.md)
+					numpy.testing.assert_allclose(result.sd, expected.sd)
+					numpy.testing.assert_allclose(result.confidenceIntervals['mean'], expected.confidenceIntervals['mean'])
+					numpy.testing.assert_allclose(result.confidenceIntervals['upperLoA'], expected.confidenceIntervals['upperLoA'])
+					self.assertEqual(result.slope, expected.slope)
+
+		with self.subTest(msg='Save plot'):
+			with tempfile.TemporaryDirectory() as tmpdirname:
+				outputPath = os.path.join(tmpdirname, 'grid')
+
+				pyCompare.blandAltmanGrid(data1, data2, groups, columns=2, sharex=True, sharey=True, title='Sites', savePath=outputPath)
+
+				self.assertTrue(os.path.exists(outputPath))
+
+		with self.subTest(msg='Return figure'):
+			import matplotlib.pyplot
+
+			with mock.patch('matplotlib.pyplot.show'):
+				fig = pyCompare.blandAltmanGrid(data1, data2, groups, columns=2)
+
+			self.assertIsInstance(fig, matplotlib.figure.Figure)
+			self.assertEqual(sum(ax.get_visible() for ax in fig.axes), 5)
+
+			matplotlib.pyplot.close(fig)
+
+		self.assertRaises(ValueError, pyCompare.blandAltmanGrid, data1, data2, groups[:-1])
+		self.assertRaises(ValueError, pyCompare.blandAltmanGrid, data1, data2, groups, limitOfAgreement=-1)
+
+
+	def test_import_is_lazy(self):
+
+		import subprocess
+
+		packagePath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+		code = ("import sys; sys.path.insert(0, sys.argv[1]); import pyCompare; "
+				"print(','.join(m for m in ('matplotlib.pyplot', 'scipy.stats', 'concurrent.futures') if m in sys.modules))")
+
+		output = subprocess.run([sys.executable, '-c', code, packagePath], capture_output=True, text=True, check=True)
+
+		self.assertEqual(output.stdout.strip(), '')
+
+
+	def test_commandLine(self):
+
+		import io
+		import csv
+		import contextlib
+		import subprocess
+		from pyCompare._cli import main
+
+		data1 = numpy.random.rand(self.noSamp)*100+10
+		data2 = data1 * 1.05 + numpy.random.randn(self.noSamp) * 5
+		data3 = data1 + numpy.random.randn(self.noSamp) * 2
+		sites = numpy.random.choice(['north', 'south'], self.noSamp)
+
+		data2[::10] = numpy.nan
+
+		with tempfile.TemporaryDirectory() as tmpdirname:
+			inputPath = os.path.join(tmpdirname, 'measurements.csv')
+			outputPath = os.path.join(tmpdirname, 'results.csv')
+			plotPath = os.path.join(tmpdirname, 'plots')
+
+			with open(inputPath, 'w', newline='') as file:
+				writer = csv.writer(file)
+				writer.writerow(['site', 'reference', 'deviceA', 'deviceB'])
+				writer.writerows(zip(sites, data1, data2, data3))
+
+			with self.subTest(msg='Groups and plots'):
+				status = main([inputPath, '-c', 'reference', 'deviceA', '-c', 'reference', 'deviceB', '-g', 'site', '-o', outputPath, '-p', plotPath, '-j', '1'])
+
+				self.assertEqual(status, 0)
+
+				with open(outputPath, newline='') as file:
+					rows = list(csv.DictReader(file))
+
+				self.assertEqual(len(rows), 4)
+				self.assertEqual([(row['site'], row['method2']) for row in rows], [('north', 'deviceA'), ('north', 'deviceB'), ('south', 'deviceA'), ('south', 'deviceB')])
+
+				for row in rows:
+					group = sites == row['site']
+					other = data2 if row['method2'] == 'deviceA' else data3
+
+					expected = pyCompare.blandAltmanStatistics(data1[group], other[group], missingData='drop')
+
+					self.assertEqual(int(row['n']), expected.n)
+					self.assertEqual(int(row['nDropped']), expected.nDropped)
+					numpy.testing.assert_allclose([float(row['md']), float(row['sd']), float(row['upperLoACIUpper'])], [expected.md, expected.sd, expected.confidenceIntervals['upperLoA'][1]], rtol=1e-12)
+					self.assertTrue(os.path.exists(row['plot']))
+					self.assertEqual(row['error'], '')
+
+			with self.subTest(msg='Worker processes'):
+				status = main([inputPath, '-c', 'reference', 'deviceB', '-g', 'site', '-o', outputPath, '-j', '2', '--percentage', '--confidence-interval', '0'])
+
+				with open(outputPath, newline='') as file:
+					rows = list(csv.DictReader(file))
+
+				expected = pyCompare.blandAltmanStatistics(data1[sites == 'north'], data3[sites == 'north'], percentage=True)
+
+				self.assertEqual(status, 0)
+				numpy.testing.assert_allclose(float(rows[0]['md']), expected.md, rtol=1e-5)
+				self.assertEqual(rows[0]['meanCILower'], '')
+				self.assertEqual(rows[0]['plot'], '')
+
+			with self.subTest(msg='Errors'):
+				status = main([inputPath, '-c', 'reference', 'deviceA', '-o', outputPath, '-j', '1', '--missing-data', 'raise'])
+
+				with open(outputPath, newline='') as file:
+					rows = list(csv.DictReader(file))
+
+				self.assertEqual(status, 1)
+				self.assertTrue(rows[0]['error'].startswith('ValueError'))
+
+			with self.subTest(msg='Missing group keys and colliding plot names'):
+				groupedPath = os.path.join(tmpdirname, 'grouped.csv')
+				groupPlotPath = os.path.join(tmpdirname, 'groupPlots')
+
+				groups = numpy.array(['a/b', 'a b', ''])[numpy.arange(self.noSamp) % 3]
+
+				with open(groupedPath, 'w', newline='') as file:
+					writer = csv.writer(file)
+					writer.writerow(['site', 'reference', 'deviceB'])
+					writer.writerows(zip(groups, data1, data3))
+
+				status = main([groupedPath, '-c', 'reference', 'deviceB', '-g', 'site', '-o', outputPath, '-p', groupPlotPath, '-j', '1'])
+
+				with open(outputPath, newline='') as file:
+					rows = list(csv.DictReader(file))
+
+				self.assertEqual(status, 0)
+				self.assertEqual(len(rows), 3)
+				self.assertEqual(sum(int(row['n']) for row in rows), self.noSamp)
+				self.assertEqual(len(set(row['plot'] for row in rows)), 3)
+
+				for row in rows:
+					self.assertTrue(os.path.exists(row['plot']))
+
+			with self.subTest(msg='Carkeet executor left as set'):
+				from pyCompare import _calculateConfidenceIntervals
+
+				self.addCleanup(pyCompare.setCarkeetExecutor)
+				pyCompare.setCarkeetExecutor('thread')
+
+				main([inputPath, '-c', 'reference', 'deviceB', '-o', outputPath, '-j', '1'])
+
+				self.assertEqual(_calculateConfidenceIntervals._executorKind, 'thread')
+
+			with self.subTest(msg='Plotting imported only for plots'):
+				packagePath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+				code = ("import sys; sys.path.insert(0, sys.argv[1]); from pyCompare._cli import main; "
+						"main([sys.argv[2], '-c', 'reference', 'deviceB', '-j', '1', '-o', sys.argv[3]]); "
+						"print('matplotlib' in sys.modules)")
+
+				output = subprocess.run([sys.executable, '-c', code, packagePath, inputPath, outputPath], capture_output=True, text=True, check=True)
+
+				self.assertEqual(output.stdout.strip(), 'False')
+
+			with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+				main([inputPath])
+
+
 	def test_blandAtlman_raises(self):
 
 		values = numpy.random.rand(self.noSamp)
@@ -99,6 +949,7 @@ class test_plotting(unittest.TestCase):
 		self.assertRaises(ValueError, pyCompare.blandAltman, values, values, confidenceInterval=100)
 		self.assertRaises(NotImplementedError, pyCompare.blandAltman, values, values, detrend='Unknown method')
 		self.assertRaises(NotImplementedError, pyCompare.blandAltman, values*2, values, confidenceIntervalMethod='Unknown method')
+		self.assertRaises(NotImplementedError, pyCompare.blandAltman, values*2, values, pointRendering='Unknown method')
 
 
 	def test_drawBlandAtlman(self):
@@ -53,6 +53,43 @@ class test_plotHelpers(unittest.TestCase):
 		self.assertEqual(obtained, expected)
 
 
+	def test_rangeFrameAxis(self):
+
+		import matplotlib
+		matplotlib.use('Agg')
+		import matplotlib.pyplot as plt
+		from pyCompare._rangeFrameAxis import setRangeFrame
+
+		fig, ax = plt.subplots()
+		ax.set_xlim(0, 14)
+
+		setRangeFrame(ax.xaxis, (1.1, 13.5))
+
+		with self.subTest(msg='Locator'):
+			ticks = ax.xaxis.get_majorticklocs()
+
+			numpy.testing.assert_allclose(ticks, [1.1, 2, 4, 6, 8, 10, 12, 13.5])
+
+		with self.subTest(msg='Formatter'):
+			labels = ax.xaxis.get_major_formatter().format_ticks(ticks)
+
+			self.assertEqual(labels, ['1.1', '', '4.0', '6.0', '8.0', '10.0', '12.0', '13.5'])
+
+		with self.subTest(msg='Formatter, one tick at a time'):
+			# As labelled by matplotlib before 3.1
+			formatter = ax.xaxis.get_major_formatter()
+			formatter.set_locs(ticks)
+
+			self.assertEqual([formatter(tick, pos) for pos, tick in enumerate(ticks)], labels)
+
+		with self.subTest(msg='Follows view limits'):
+			ax.set_xlim(0, 28)
+
+			numpy.testing.assert_allclose(ax.xaxis.get_majorticklocs(), [1.1, 5, 10, 13.5])
+
+		plt.close(fig)
+
+
 class test_statsHelpers(unittest.TestCase):
 
 	def test_carkeetCIest(self):
@@ -85,6 +122,159 @@ class test_statsHelpers(unittest.TestCase):
 		numpy.testing.assert_allclose(expected, obtained, atol=0.001)
 
 
+	def test_carkeetCIest_evaluations(self):
+
+		from pyCompare._carkeetCIest import carkeetCIest
+
+		n = numpy.random.randint(2, high=500, size=None)
+
+		coeff, evaluations = carkeetCIest(n, 0.975, 1.96, fullOutput=True)
+
+		self.assertEqual(coeff, carkeetCIest(n, 0.975, 1.96))
+		self.assertLessEqual(evaluations, 20)
+
+
+	def test_carkeetCIest_gauss(self):
+
+		from pyCompare._carkeetCIest import carkeetCIest
+
+		referenceValues = pandas.read_csv('referenceCIs.csv')
+
+		for i, row in referenceValues.sample(n=4).iterrows():
+			level = numpy.random.randint(1, high=5, size=None)
+
+			obtained = carkeetCIest(row.v + 1, float(row.index[level]), 1.96, integrationMethod='Gauss')
+
+			numpy.testing.assert_allclose(row.iloc[level], obtained, atol=0.001)
+
+		with self.subTest(msg='Large n'):
+			n = numpy.random.randint(10**4, high=5 * 10**4, size=None)
+
+			obtained = carkeetCIest(n, 0.025, 1.96, integrationMethod='Gauss')
+			expected = carkeetCIest(n, 0.025, 1.96, integrationMethod='Simpson')
+
+			numpy.testing.assert_allclose(expected, obtained, atol=1e-8)
+
+		self.assertRaises(NotImplementedError, carkeetCIest, 20, 0.975, 1.96, integrationMethod='Unknown method')
+
+
+	def test_carkeetCache(self):
+
+		from pyCompare import _carkeetCache
+		from pyCompare._carkeetCIest import carkeetCIest
+
+		referenceValues = pandas.read_csv('referenceCIs.csv')
+
+		with self.subTest(msg='Shipped table'):
+			_carkeetCache.clearCarkeetCache()
+
+			for i, row in referenceValues.sample(n=10).iterrows():
+				obtained = _carkeetCache.lookupCarkeetCIest(row.v + 1, 0.025, 1.96)
+				numpy.testing.assert_allclose(row['0.025'], obtained, atol=0.001)
+
+				# The reference value at n=2, 73.0772, agrees to five significant figures
+				obtained = _carkeetCache.lookupCarkeetCIest(row.v + 1, 1 - (1 - 0.95) / 2., 1.96)
+				numpy.testing.assert_allclose(row['0.975'], obtained, atol=0.001, rtol=1e-4)
+
+		with self.subTest(msg='Interpolated'):
+			n = numpy.random.randint(801, high=1000, size=None)
+
+			obtained = _carkeetCache.lookupCarkeetCIest(n, 0.975, 1.96)
+			expected = carkeetCIest(n, 0.975, 1.96)
+
+			numpy.testing.assert_allclose(expected, obtained, atol=_carkeetCache.INTERPOLATION_TOLERANCE)
+			self.assertIsNone(_carkeetCache.lookupCarkeetCIest(n, 0.025, 1.96, interpolate=False))
+
+		with self.subTest(msg='Not cached'):
+			self.assertIsNone(_carkeetCache.lookupCarkeetCIest(20, 0.975, 2.5))
+			self.assertIsNone(_carkeetCache.lookupCarkeetCIest(20000, 0.975, 1.96))
+
+		with tempfile.TemporaryDirectory() as tmpdirname:
+			with self.subTest(msg='On-disk store'):
+				_carkeetCache.setCarkeetCacheDirectory(tmpdirname)
+				try:
+					_carkeetCache.storeCarkeetCIest(20, 0.975, 2.5, 3.14)
+					_carkeetCache.clearCarkeetCache()
+
+					self.assertEqual(_carkeetCache.lookupCarkeetCIest(20, 0.975, 2.5), 3.14)
+				finally:
+					_carkeetCache.setCarkeetCacheDirectory(None)
+					_carkeetCache.clearCarkeetCache()
+
+				self.assertIsNone(_carkeetCache.lookupCarkeetCIest(20, 0.975, 2.5))
+
+
+	def test_batchCarkeetCIest(self):
+
+		from pyCompare import _calculateConfidenceIntervals, _carkeetCache
+		from pyCompare._carkeetCIest import carkeetCIest
+		from concurrent.futures import ThreadPoolExecutor
+
+		jobs = [(20, 0.025, 2.5), (20, 0.975, 2.5), (30, 0.975, 2.5), (20, 0.025, 2.5)]
+		expected = [carkeetCIest(*job, integrationMethod='Gauss') for job in jobs]
+
+		try:
+			for executor in ['process', 'thread', None, ThreadPoolExecutor(max_workers=2)]:
+				with self.subTest(msg=f'{executor} executor'):
+					_carkeetCache.clearCarkeetCache()
+					pyCompare.setCarkeetExecutor(executor)
+
+					obtained = _calculateConfidenceIntervals.batchCarkeetCIest(jobs)
+
+					numpy.testing.assert_allclose(expected, obtained)
+
+					if isinstance(executor, str):
+						poolUsed = _calculateConfidenceIntervals._executor
+						_carkeetCache.clearCarkeetCache()
+						_calculateConfidenceIntervals.batchCarkeetCIest(jobs)
+
+						self.assertIs(poolUsed, _calculateConfidenceIntervals._executor)
+
+			executor.shutdown()
+
+		finally:
+			pyCompare.setCarkeetExecutor('process')
+			_carkeetCache.clearCarkeetCache()
+
+		self.assertIsNone(_calculateConfidenceIntervals._executor)
+		self.assertRaises(NotImplementedError, pyCompare.setCarkeetExecutor, 'Unknown executor')
+		self.assertRaises(TypeError, pyCompare.setCarkeetExecutor, 2)
+
+
+	def test_quantileSketch(self):
+
+		values = numpy.concatenate((numpy.random.standard_t(3, 20000) * 10, numpy.zeros(100), -numpy.random.lognormal(size=500)))
+		numpy.random.shuffle(values)
+
+		ordered = numpy.sort(values)
+		quantiles = numpy.array([0, 0.001, 0.025, 0.1, 0.5, 0.9, 0.975, 0.999, 1])
+		expected = ordered[numpy.floor(quantiles * (values.size - 1)).astype(int)]
+
+		for accuracy in [0.01, 0.001]:
+			with self.subTest(msg=f'Accuracy {accuracy}'):
+				sketch = pyCompare.QuantileSketch(accuracy)
+
+				for chunk in numpy.array_split(values, 13):
+					sketch.update(chunk)
+
+				obtained = sketch.quantile(quantiles)
+
+				self.assertEqual(sketch.n, values.size)
+				self.assertTrue(numpy.all(numpy.abs(obtained - expected) <= accuracy * numpy.abs(expected) + 1e-12))
+				self.assertEqual(sketch.quantile(0.5), obtained[4])
+
+		with self.subTest(msg='Merge'):
+			merged = pyCompare.QuantileSketch().update(values[:5000]).merge(pyCompare.QuantileSketch().update(values[5000:]))
+			whole = pyCompare.QuantileSketch().update(values)
+
+			numpy.testing.assert_array_equal(merged.quantile(quantiles), whole.quantile(quantiles))
+
+		self.assertRaises(ValueError, pyCompare.QuantileSketch, 0)
+		self.assertRaises(ValueError, pyCompare.QuantileSketch(0.01).merge, pyCompare.QuantileSketch(0.001))
+		self.assertRaises(ValueError, pyCompare.QuantileSketch().quantile, 0.5)
+		self.assertRaises(ValueError, whole.quantile, 1.5)
+
+
 	def test_detrend(self):
 
 		from pyCompare._detrend import detrend
@@ -122,6 +312,45 @@ class test_statsHelpers(unittest.TestCase):
 			numpy.testing.assert_allclose(data1, data2Obtained)
 			numpy.testing.assert_allclose(slope, slopeObtained)
 
+		with self.subTest(msg='Deming'):
+
+			data2 = data1 * slope
+
+			data2Obtained, slopeObtained, slopeErrObtained = detrend('Deming', data1, data2)
+
+			numpy.testing.assert_allclose(data1, data2Obtained)
+			numpy.testing.assert_allclose(slope, slopeObtained)
+			self.assertIsInstance(slopeObtained, float)
+
+		with self.subTest(msg='Deming, noisy'):
+
+			data2 = data1 * slope + numpy.random.randn(sampleCount) * slope * 0.1 + 1
+
+			data2Expected, slopeExpected, slopeErrExpected = detrend('ODR', data1, data2)
+			data2Obtained, slopeObtained, slopeErrObtained = detrend('Deming', data1, data2)
+
+			numpy.testing.assert_allclose(slopeExpected, slopeObtained, rtol=1e-6)
+			numpy.testing.assert_allclose(data2Expected, data2Obtained, rtol=1e-6)
+
+			# Direct jackknife
+			n = sampleCount
+			jackknife = numpy.array([detrend('Deming', numpy.delete(data1, i), numpy.delete(data2, i))[1] for i in range(n)])
+			numpy.testing.assert_allclose(numpy.sqrt((n - 1) / n * numpy.sum((jackknife - jackknife.mean())**2)), slopeErrObtained)
+
+		with self.subTest(msg='Deming, batch'):
+
+			batch1 = numpy.random.randn(4, sampleCount)
+			batch2 = batch1 * slope + numpy.random.randn(4, sampleCount) * 0.1
+
+			data2Obtained, slopeObtained, slopeErrObtained = detrend('Deming', batch1, batch2)
+
+			for i in range(4):
+				row2, rowSlope, rowSlopeErr = detrend('Deming', batch1[i], batch2[i])
+
+				numpy.testing.assert_allclose(row2, data2Obtained[i])
+				numpy.testing.assert_allclose(rowSlope, slopeObtained[i])
+				numpy.testing.assert_allclose(rowSlopeErr, slopeErrObtained[i])
+
 
 	def test_detrend_raises(self):
 
@@ -184,6 +413,37 @@ class test_statsHelpers(unittest.TestCase):
 			key = 'lowerLoA'
 			numpy.testing.assert_array_almost_equal(expected[key], obtained[key], decimal=2)
 
+		with self.subTest(msg='Bootstrap'):
+			from pyCompare._calculateConfidenceIntervals import setBootstrapOptions
+
+			diff = numpy.random.randn(2000) * 19.61 - 16.26
+			md = numpy.mean(diff)
+			sd = numpy.std(diff)
+
+			expected = calculateConfidenceIntervals(md, sd, diff.size, 1.96, 95, 'approximate')
+
+			try:
+				# Small blocks, so resamples are split between several threads
+				setBootstrapOptions(resamples=1000, seed=42, maxWorkers=1, maxBlockBytes=2**20)
+				obtained = calculateConfidenceIntervals(md, sd, diff.size, 1.96, 95, 'bootstrap', diff=diff)
+
+				for key in ['mean', 'upperLoA', 'lowerLoA']:
+					numpy.testing.assert_allclose(expected[key], obtained[key], atol=1)
+
+				setBootstrapOptions(resamples=1000, seed=42, maxWorkers=4, maxBlockBytes=2**20)
+				repeated = calculateConfidenceIntervals(md, sd, diff.size, 1.96, 95, 'bootstrap', diff=diff)
+
+				self.assertEqual(obtained, repeated)
+
+				batch = calculateConfidenceIntervals(numpy.array([md, md]), numpy.array([sd, sd]), diff.size, 1.96, 95, 'bootstrap', diff=numpy.stack([diff, diff]))
+
+				for key in ['mean', 'upperLoA', 'lowerLoA']:
+					numpy.testing.assert_allclose(batch[key][0], obtained[key][0])
+					numpy.testing.assert_allclose(batch[key][1], obtained[key][1])
+
+			finally:
+				setBootstrapOptions()
+
 
 	def test_calculateConfidenceIntervals_raises(self):
 		from pyCompare._calculateConfidenceIntervals import calculateConfidenceIntervals
@@ -196,3 +456,9 @@ class test_statsHelpers(unittest.TestCase):
 
 		with self.subTest(msg='Unknown CI method'):
 			self.assertRaises(NotImplementedError, calculateConfidenceIntervals, 1, 1, 1, 1.96, 95, 'Undefined Method')
+
+		with self.subTest(msg='Bootstrap without differences'):
+			self.assertRaises(ValueError, calculateConfidenceIntervals, 1, 1, 10, 1.96, 95, 'bootstrap')
+
+		with self.subTest(msg='No resamples'):
+			self.assertRaises(ValueError, pyCompare.setBootstrapOptions, resamples=0)